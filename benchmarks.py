@@ -0,0 +1,309 @@
+import os
+import re
+import json
+import time
+import random
+import sqlite3
+import argparse
+import subprocess
+import tempfile
+
+import yt_dlp
+from bs4 import BeautifulSoup
+
+from vm_tiktok_youtube_with_watermark import (
+    COPYRIGHT_TERMS,
+    ENCODING_PROFILES,
+    METADATA_CACHE_FILE,
+    ContentFilter,
+    VideoLinkAccumulator,
+    YoutubeDLPool,
+    encoding_args,
+    extract_page_records,
+    get_ffmpeg_exe,
+    watermark_filter,
+)
+
+
+def benchmark_encoding(sample_path, profiles=None, watermark_text="© My Channel"):
+    """Watermark a sample clip with each encoding profile and report wall time and output size"""
+    profiles = profiles or list(ENCODING_PROFILES)
+    input_size = os.path.getsize(sample_path)
+    print(f"Sample: {sample_path} ({input_size / (1024 * 1024):.2f}MB)")
+    print(f"{'profile':<12}{'preset':<12}{'crf':>5}{'time (s)':>12}{'size (MB)':>12}{'vs input':>10}")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for profile in profiles:
+            output_path = os.path.join(tmp_dir, f"{profile}.mp4")
+            ffmpeg_cmd = [
+                get_ffmpeg_exe(),
+                "-i", sample_path,
+                "-vf", watermark_filter(watermark_text),
+                *encoding_args(profile),
+                "-codec:a", "copy",
+                "-y",
+                output_path
+            ]
+
+            start_time = time.perf_counter()
+            result = subprocess.run(ffmpeg_cmd, capture_output=True, text=True)
+            elapsed = time.perf_counter() - start_time
+
+            if result.returncode != 0:
+                print(f"{profile:<12}FFmpeg failed: {result.stderr.strip().splitlines()[-1]}")
+                continue
+
+            output_size = os.path.getsize(output_path)
+            settings = ENCODING_PROFILES[profile]
+            print(f"{profile:<12}{settings['preset']:<12}{settings['crf']:>5}{elapsed:>12.2f}"
+                  f"{output_size / (1024 * 1024):>12.2f}{output_size / input_size:>9.2f}x")
+
+
+def synthetic_page(video_count, padding_kb=1024):
+    """Build a search-results-like page with video_count videoRenderers and padding_kb of other markup"""
+    items = [{
+        "videoRenderer": {
+            "videoId": f"vid{i:08d}",
+            "title": {"runs": [{"text": f"Synthetic video {i}"}]},
+            "ownerText": {"runs": [{"text": f"Channel {i % 50}", "navigationEndpoint": {
+                "browseEndpoint": {"browseId": f"UC{i % 50:022d}", "canonicalBaseUrl": f"/@channel{i % 50}"}}}]},
+        }
+    } for i in range(video_count)]
+    data = {"contents": {"twoColumnSearchResultsRenderer": {"primaryContents": {
+        "sectionListRenderer": {"contents": [{"itemSectionRenderer": {"contents": items}}]}}}}}
+    filler = "<div class=\"style-scope\"><span>filler</span></div>\n" * (padding_kb * 1024 // 48)
+    return (f"<html><head><script>var ytcfg = {{}};</script></head><body>{filler}"
+            f"<script>var ytInitialData = {json.dumps(data, separators=(',', ':'))};</script>{filler}</body></html>")
+
+
+def soup_video_ids(html):
+    """The previous extraction path: full BeautifulSoup parse, then regex over matching scripts"""
+    soup = BeautifulSoup(html, 'html.parser')
+    video_ids = []
+    for script in soup.find_all("script"):
+        if script.string and "videoRenderer" in script.string:
+            video_ids.extend(re.findall(r'"videoId":"([^"]+)"', script.string))
+    return video_ids
+
+
+def benchmark_page_parsing(fixture_paths=None, synthetic_videos=200, repeat=5):
+    """Time the ytInitialData extractor against the BeautifulSoup path on saved or synthetic pages"""
+    pages = []
+    for path in fixture_paths or []:
+        with open(path, encoding="utf-8") as f:
+            pages.append((os.path.basename(path), f.read()))
+    if not pages:
+        pages.append((f"synthetic-{synthetic_videos}", synthetic_page(synthetic_videos)))
+
+    print(f"{'page':<32}{'size (KB)':>10}{'videos':>8}{'soup (ms)':>12}{'fast (ms)':>12}{'speedup':>9}")
+    for name, html in pages:
+        timings = {}
+        for label, extract in (("soup", soup_video_ids), ("fast", extract_page_records)):
+            start_time = time.perf_counter()
+            for _ in range(repeat):
+                result = extract(html)
+            timings[label] = (time.perf_counter() - start_time) / repeat * 1000
+            if label == "fast":
+                video_count = len(result[0]) if result else 0
+
+        print(f"{name[:31]:<32}{len(html) / 1024:>10.0f}{video_count:>8}{timings['soup']:>12.1f}"
+              f"{timings['fast']:>12.1f}{timings['soup'] / timings['fast']:>8.1f}x")
+
+
+def quadratic_video_links(video_ids):
+    """The previous accumulation loop: re-split the whole list for every membership check"""
+    video_links = []
+    for video_id in video_ids:
+        if video_id not in [link.split('=')[-1].split('&')[0] for link in video_links]:
+            video_links.append(f"https://www.youtube.com/watch?v={video_id}")
+    return video_links
+
+
+def accumulated_video_links(video_ids):
+    video_links = VideoLinkAccumulator()
+    for video_id in video_ids:
+        video_links.add_id(video_id)
+    return video_links.urls()
+
+
+def benchmark_dedup_scaling(sizes=(1000, 2000, 4000, 8000), duplicate_ratio=0.25):
+    """Time link de-duplication on synthetic ID streams of growing size"""
+    print(f"{'ids':>8}{'old (ms)':>12}{'new (ms)':>12}{'new ms/1k ids':>15}")
+    for size in sizes:
+        unique_count = int(size * (1 - duplicate_ratio))
+        video_ids = [f"vid{i % unique_count:08d}" for i in range(size)]
+
+        timings = {}
+        for label, accumulate in (("old", quadratic_video_links), ("new", accumulated_video_links)):
+            start_time = time.perf_counter()
+            links = accumulate(video_ids)
+            timings[label] = (time.perf_counter() - start_time) * 1000
+            assert len(links) == unique_count
+
+        print(f"{size:>8}{timings['old']:>12.1f}{timings['new']:>12.2f}{timings['new'] / size * 1000:>15.3f}")
+
+
+def benchmark_ydl_pool(calls=50, url=None):
+    """Compare building a YoutubeDL per call with borrowing one from YoutubeDLPool"""
+    ydl_opts = {'quiet': True, 'no_warnings': True, 'skip_download': True, 'ignoreerrors': True}
+
+    def work(ydl):
+        if url:
+            ydl.extract_info(url, download=False)
+        else:
+            ydl.get_info_extractor('Youtube')
+
+    # Warm up module imports so neither side pays for them
+    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        work(ydl)
+
+    start_time = time.perf_counter()
+    for _ in range(calls):
+        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            work(ydl)
+    per_call = (time.perf_counter() - start_time) / calls * 1000
+
+    pool = YoutubeDLPool({"probe": lambda: dict(ydl_opts)})
+    start_time = time.perf_counter()
+    for _ in range(calls):
+        with pool.acquire("probe") as ydl:
+            work(ydl)
+    pooled = (time.perf_counter() - start_time) / calls * 1000
+    pool.close()
+
+    print(f"{'mode':<22}{'ms/call':>10}")
+    print(f"{'new YoutubeDL per call':<22}{per_call:>10.2f}")
+    print(f"{'pooled instance':<22}{pooled:>10.2f}")
+    print(f"Instances created by the pool: {pool.created['probe']}, reused: {pool.reused['probe']}")
+
+
+def cached_metadata_records(db_file, limit):
+    """Title and description of up to limit entries from the metadata cache"""
+    if not os.path.exists(db_file):
+        return []
+    conn = sqlite3.connect(db_file)
+    try:
+        rows = conn.execute("SELECT info FROM video_metadata LIMIT ?", (limit,)).fetchall()
+    finally:
+        conn.close()
+    records = []
+    for (info,) in rows:
+        info = json.loads(info)
+        records.append({key: info.get(key) for key in ("id", "title", "description")})
+    return records
+
+
+def synthetic_metadata_records(count, seed=0):
+    """Descriptions of realistic length mixing relevant, unrelated and copyrighted videos"""
+    rng = random.Random(seed)
+    words = ("tonight", "crowd", "stadium", "fans", "song", "video", "watch", "subscribe", "amazing",
+             "night", "tour", "filmed", "front", "row", "camera", "vlog", "review", "reaction")
+    records = []
+    for i in range(count):
+        body = " ".join(rng.choice(words) for _ in range(rng.randint(40, 300)))
+        title = rng.choice(["Taylor Swift Eras Tour night 3", "My weekend vlog", "Taylor Swift live in London",
+                            "Reaction video", "Concert crowd cam"])
+        if rng.random() < 0.3:
+            body += "\n\n" + rng.choice(["© 2023 Republic Records", "Provided to YouTube by UMG",
+                                          "All rights reserved."])
+        records.append({"id": f"vid{i:08d}", "title": title, "description": body})
+    return records
+
+
+def legacy_content_checks(info):
+    """The previous per-video relevance and copyright checks"""
+    title = info.get('title', '').lower()
+    description = info.get('description', '').lower()
+    is_relevant = ('taylor swift' in title or 'taylor swift' in description) and \
+                  ('concert' in title or 'concert' in description or
+                   'live' in title or 'live' in description or
+                   'eras tour' in title or 'eras tour' in description or
+                   'performance' in title or 'performance' in description)
+    has_copyright = any(indicator in description.lower() for indicator in COPYRIGHT_TERMS)
+    return is_relevant, has_copyright
+
+
+def benchmark_content_filter(db_file=METADATA_CACHE_FILE, count=5000, repeat=3):
+    """Time the legacy substring checks against ContentFilter on cached (or synthetic) descriptions"""
+    records = cached_metadata_records(db_file, count)
+    source = f"{len(records)} cached"
+    if len(records) < count:
+        source += f" + {count - len(records)} synthetic"
+        records += synthetic_metadata_records(count - len(records))
+
+    content_filter = ContentFilter()
+    terms = sorted({term for group in content_filter.terms.values() for term in group}, key=len, reverse=True)
+    alternation = re.compile("|".join(re.escape(term) for term in terms), re.IGNORECASE)
+    legacy = [legacy_content_checks(info) for info in records]
+    batch = content_filter.classify_batch(records)
+    mismatches = sum(old != (new.relevant, new.copyrighted) for old, new in zip(legacy, batch))
+
+    modes = (
+        ("legacy substring scans", lambda: [legacy_content_checks(info) for info in records]),
+        ("single alternation regex", lambda: [(alternation.findall(info.get('title') or ''),
+                                               alternation.findall(info.get('description') or ''))
+                                              for info in records]),
+        ("ContentFilter.classify_batch", lambda: content_filter.classify_batch(records)),
+    )
+    print(f"Records: {len(records)} ({source}), "
+          f"{sum(len(info.get('description') or '') for info in records) / 1024:.0f} KB of descriptions")
+    print(f"{'mode':<30}{'total (ms)':>12}{'us/record':>11}")
+    for label, run in modes:
+        start_time = time.perf_counter()
+        for _ in range(repeat):
+            run()
+        elapsed = (time.perf_counter() - start_time) / repeat
+        print(f"{label:<30}{elapsed * 1000:>12.1f}{elapsed / len(records) * 1e6:>11.2f}")
+    print(f"Relevant: {sum(v.relevant for v in batch)}, copyrighted: {sum(v.copyrighted for v in batch)}, "
+          f"verdicts differing from the legacy checks: {mismatches}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Performance benchmarks for the reuploader")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    encoding_parser = subparsers.add_parser("encoding", help="Compare watermark encoding profiles on a sample clip")
+    encoding_parser.add_argument("sample", help="Path to a sample video clip")
+    encoding_parser.add_argument("--profiles", nargs="+", choices=list(ENCODING_PROFILES),
+                                 help="Profiles to run (default: all)")
+
+    parsing_parser = subparsers.add_parser("page-parsing",
+                                           help="Compare ytInitialData extraction with the BeautifulSoup path")
+    parsing_parser.add_argument("fixtures", nargs="*", help="Saved YouTube search/channel HTML pages")
+    parsing_parser.add_argument("--synthetic-videos", type=int, default=200,
+                                help="Videos in the generated page when no fixtures are given")
+    parsing_parser.add_argument("--repeat", type=int, default=5, help="Runs per page to average over")
+
+    dedup_parser = subparsers.add_parser("dedup-scaling",
+                                         help="Show how video link de-duplication scales with page size")
+    dedup_parser.add_argument("--sizes", nargs="+", type=int, default=[1000, 2000, 4000, 8000],
+                              help="Numbers of scraped IDs to accumulate")
+
+    pool_parser = subparsers.add_parser("ytdl-pool", help="Compare per-call YoutubeDL setup with the instance pool")
+    pool_parser.add_argument("--calls", type=int, default=50, help="Calls to time for each mode")
+    pool_parser.add_argument("--url", help="Video URL to extract on each call (needs network); "
+                                           "without it only setup cost is measured")
+
+    filter_parser = subparsers.add_parser("content-filter",
+                                          help="Compare the legacy relevance/copyright checks with ContentFilter")
+    filter_parser.add_argument("--db", default=METADATA_CACHE_FILE, help="Metadata cache to read descriptions from")
+    filter_parser.add_argument("--count", type=int, default=5000,
+                               help="Records to classify (topped up with synthetic ones if the cache has fewer)")
+    filter_parser.add_argument("--repeat", type=int, default=3, help="Runs per mode to average over")
+
+    args = parser.parse_args()
+
+    if args.benchmark == "encoding":
+        benchmark_encoding(args.sample, args.profiles)
+    elif args.benchmark == "page-parsing":
+        benchmark_page_parsing(args.fixtures, args.synthetic_videos, args.repeat)
+    elif args.benchmark == "dedup-scaling":
+        benchmark_dedup_scaling(args.sizes)
+    elif args.benchmark == "ytdl-pool":
+        benchmark_ydl_pool(args.calls, args.url)
+    elif args.benchmark == "content-filter":
+        benchmark_content_filter(args.db, args.count, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,9 +2,12 @@ import os
 import time
 import random
 import json
-import schedule
+import asyncio
 import re
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from urllib3.util.request import ACCEPT_ENCODING
 from bs4 import BeautifulSoup
 import google_auth_oauthlib.flow
 import googleapiclient.discovery
@@ -16,9 +19,27 @@ import cv2
 import numpy as np
 import traceback
 import subprocess
+import sys
+import tempfile
+import shutil
+import hashlib
 import gc
-from functools import wraps
+import atexit
+import sqlite3
+import threading
+import uuid
+from collections import OrderedDict, defaultdict, namedtuple
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed, wait, FIRST_COMPLETED
+from contextlib import contextmanager
+from urllib.parse import urlparse, parse_qs
+from functools import wraps, partial
 import logging
+import multiprocessing
+
+try:
+    import fcntl  # File locks for the state files shared by worker processes
+except ImportError:
+    fcntl = None
 
 # Configure logging
 logging.basicConfig(
@@ -35,12 +56,113 @@ logger = logging.getLogger(__name__)
 youtube_upload = True
 tiktok_upload = True
 
+# Watermark text burned into the video for each platform
+WATERMARK_TEXTS = {
+    "youtube": "© taylors_wonderland_official",  # Customize this
+    "tiktok": "© taylorswift.wonderland",  # Customize this
+}
+
 # Maximum retry counts
 MAX_CHANNEL_RETRIES = 5  # Number of different channels to try if all else fails
 MAX_VIDEO_RETRIES = 3    # Videos to try per channel
 MAX_DOWNLOAD_RETRIES = 5 # Download attempts per video
 MAX_UPLOAD_RETRIES = 3   # Upload attempts per platform
 
+# Candidate probing settings
+CONCURRENT_PROBING = True      # Probe candidate videos in parallel instead of one at a time
+PROBE_WORKERS = 4              # Number of parallel metadata probes
+PROBE_HOST_MIN_INTERVAL = 1.0  # Minimum seconds between probe requests to the same host
+PROBE_HOST_MAX_CONCURRENT = 2  # Maximum in-flight probe requests per host
+PROBE_TARGET_CANDIDATES = 5    # Stop probing once this many acceptable videos are found
+YTDL_POOL_SIZE = PROBE_WORKERS  # Pooled YoutubeDL instances per option profile
+PROBE_BATCH_SIZE = 10          # Videos resolved per batched extract pass
+
+# Shared HTTP client settings for page scraping
+HTTP_POOL_SIZE = 10      # Keep-alive connections kept open per host
+HTTP_MAX_RETRIES = 3     # Retries for connection errors and 429/5xx responses
+HTTP_TIMEOUT = 15        # Seconds per request
+
+# Run the per-platform upload branches concurrently instead of one after the other
+PARALLEL_UPLOADS = True
+
+# Pipe yt-dlp straight into FFmpeg instead of writing the original file to disk first
+STREAMING_PIPELINE = False
+
+# YouTube upload settings
+YOUTUBE_UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024  # Bytes per resumable upload request (multiple of 256KB)
+YOUTUBE_UPLOAD_SESSIONS_FILE = "youtube_upload_sessions.json"  # Interrupted upload sessions to resume
+YOUTUBE_UPLOAD_SESSION_TTL = 6 * 24 * 3600  # YouTube keeps resumable sessions for about a week
+
+# Encoding profiles for the watermark re-encode (software libx264, no GPU needed)
+#   preset: x264 speed/compression trade-off, crf: constant quality (lower is better and bigger),
+#   threads: encoder threads (0 = auto), tune: optional x264 tuning
+ENCODING_PROFILES = {
+    "fast": {"preset": "veryfast", "crf": 26, "threads": 0, "tune": None},
+    "balanced": {"preset": "faster", "crf": 23, "threads": 0, "tune": None},
+    "archival": {"preset": "slow", "crf": 18, "threads": 0, "tune": "film"},
+}
+DEFAULT_ENCODING_PROFILE = "balanced"
+
+# TikTok browser session settings
+TIKTOK_SESSION_MAX_UPLOADS = 10     # Recycle the browser after this many uploads
+TIKTOK_SESSION_MAX_IDLE = 2 * 3600  # Recycle the browser if it sat idle longer than this (seconds)
+
+TIKTOK_SELECTOR_CACHE_FILE = "tiktok_selectors.json"  # Remembers which selectors found each element
+TIKTOK_SESSION_LOCK_FILE = "tiktok_session"  # Lets one worker process at a time use the TikTok account
+
+# Channel listing settings
+CHANNEL_LISTING_LIMIT = 200  # Newest videos to list per channel (continuation pages are fetched lazily)
+
+# Channel registry settings
+CHANNEL_REGISTRY_FILE = "channel_registry.db"
+CHANNEL_DISCOVERY_INTERVAL = 8 * 3600  # Seconds between background discovery refreshes
+CHANNEL_DISCOVERY_BATCH = 3            # New channels to look for per refresh
+CHANNEL_MAX_FAILURES = 5               # Consecutive failures before a channel is skipped
+CHANNEL_FAILURE_COOLDOWN = 3 * 24 * 3600  # Seconds after its last failure before a skipped channel is tried again
+
+# Local media cache settings
+MEDIA_CACHE_MAX_BYTES = 2 * 1024 ** 3  # Downloads and watermarked copies kept for reuse
+DOWNLOAD_FORMAT = "best[ext=mp4]/best"  # Fallback yt-dlp format when no probed format can be matched to the targets
+
+# Source quality each platform needs. The watermark pass re-encodes everything, so anything
+# above this is wasted download and decode time. short_side is the shorter picture side in
+# pixels (1080 means 1080p for landscape and vertical videos alike), abr the audio kbps.
+PLATFORM_FORMAT_TARGETS = {
+    "youtube": {"short_side": 1080, "abr": 128},
+    "tiktok": {"short_side": 720, "abr": 128},
+}
+
+# Video job settings
+JOB_STORE_FILE = "video_jobs.db"
+JOB_MAX_ATTEMPTS = 3  # Failed attempts before a video's job is given up and its files cleaned up
+
+# Video metadata cache settings
+METADATA_CACHE_FILE = "video_metadata_cache.db"
+METADATA_CACHE_TTL = 7 * 24 * 3600  # Seconds before cached metadata is fetched again
+METADATA_CACHE_MEMORY_SIZE = 512    # Entries kept in the in-memory LRU
+
+# Pipeline orchestration settings
+PIPELINE_CYCLE_INTERVAL = 8 * 3600  # Seconds between pipeline cycles
+PIPELINE_VIDEOS_PER_CYCLE = 1       # Successful uploads per cycle
+PIPELINE_QUEUE_SIZE = 2             # Items waiting between two stages
+PIPELINE_STAGE_WORKERS = {"probe": 2, "download": 2, "watermark": 1, "upload": 1}
+
+# Content filter terms (matched case-insensitively as substrings of titles and descriptions)
+RELEVANCE_SUBJECT_TERMS = ("taylor swift",)
+RELEVANCE_CONTEXT_TERMS = ("concert", "live", "eras tour", "performance")
+COPYRIGHT_TERMS = ("©", "copyright", "all rights reserved", "licensed to", "provided to youtube")
+
+# Limits each platform puts on a source video, checked against probed metadata before
+# anything is downloaded (None disables a limit). A video must fit every enabled platform.
+PLATFORM_MEDIA_LIMITS = {
+    "youtube": {"max_duration": 180, "max_filesize": 512 * 1024 ** 2, "min_height": 360},  # Shorts
+    "tiktok": {"max_duration": 600, "max_filesize": 512 * 1024 ** 2, "min_height": 360},
+}
+
+# Multi-process worker mode (0 keeps the single-process asyncio pipeline)
+WORKER_PROCESSES = 0
+WORKER_CHANNELS_PER_CYCLE = 4  # Channels to process successfully per cycle in worker mode
+
 # Retry decorator for functions that should be retried on failure
 def retry(max_tries=3, delay_seconds=1, backoff_factor=2, exceptions=(Exception,)):
     """
@@ -78,8 +200,1511 @@ def retry(max_tries=3, delay_seconds=1, backoff_factor=2, exceptions=(Exception,
     return decorator
 
 
+class HostRateLimiter:
+    """
+    Per-host rate limiter shared between worker threads
+    
+    Args:
+        min_interval: Minimum seconds between request starts to the same host
+        max_concurrent: Maximum number of in-flight requests per host
+    """
+    def __init__(self, min_interval=PROBE_HOST_MIN_INTERVAL, max_concurrent=PROBE_HOST_MAX_CONCURRENT):
+        self.min_interval = min_interval
+        self.max_concurrent = max_concurrent
+        self._lock = threading.Lock()
+        self._semaphores = {}
+        self._next_slot = {}
+    
+    @contextmanager
+    def limit(self, url):
+        """Block until a request to the url's host is allowed, then hold a slot for it"""
+        host = urlparse(url).netloc or url
+        with self._lock:
+            semaphore = self._semaphores.setdefault(host, threading.BoundedSemaphore(self.max_concurrent))
+        
+        semaphore.acquire()
+        try:
+            # Reserve the next start slot for this host, with some jitter to avoid a fixed pattern
+            with self._lock:
+                now = time.monotonic()
+                slot = max(now, self._next_slot.get(host, now))
+                self._next_slot[host] = slot + self.min_interval * random.uniform(1, 1.5)
+            
+            wait = slot - now
+            if wait > 0:
+                time.sleep(wait)
+            yield
+        finally:
+            semaphore.release()
+
+
+class ScraperHttpClient:
+    """
+    Keep-alive HTTP client shared by the page scrapers
+    
+    Wraps a requests.Session with pooled connections, retries on connection errors and
+    429/5xx responses, compressed transfers (brotli too when a decoder is installed) and a
+    per-host limiter. Keeps counters for connection reuse and bytes transferred.
+    
+    Args:
+        user_agents: User agents to rotate between requests
+        rate_limiter: HostRateLimiter applied to every request
+    """
+    def __init__(self, user_agents, rate_limiter, pool_size=HTTP_POOL_SIZE, max_retries=HTTP_MAX_RETRIES,
+                 timeout=HTTP_TIMEOUT):
+        self.user_agents = user_agents
+        self.rate_limiter = rate_limiter
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._bytes_received = 0
+        self._bytes_decoded = 0
+        self._request_count = 0
+        
+        retries = Retry(total=max_retries, backoff_factor=1, status_forcelist=(429, 500, 502, 503, 504),
+                        allowed_methods=("GET", "HEAD"), raise_on_status=False)
+        self.adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retries)
+        
+        self.session = requests.Session()
+        self.session.mount("https://", self.adapter)
+        self.session.mount("http://", self.adapter)
+        self.session.headers.update({
+            "Accept-Language": "en-US,en;q=0.9",
+            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
+            "Accept-Encoding": ACCEPT_ENCODING,
+        })
+    
+    def get(self, url, **kwargs):
+        """GET a url through the pooled session under the per-host limit"""
+        headers = {"User-Agent": random.choice(self.user_agents), **kwargs.pop("headers", {})}
+        kwargs.setdefault("timeout", self.timeout)
+        
+        with self.rate_limiter.limit(url):
+            response = self.session.get(url, headers=headers, **kwargs)
+        
+        with self._lock:
+            self._request_count += 1
+            self._bytes_decoded += len(response.content)
+            # tell() reports the bytes read off the wire, before decompression
+            self._bytes_received += response.raw.tell() if response.raw else 0
+        return response
+    
+    def stats(self):
+        """Return request, connection and transfer counters"""
+        connections = pooled_requests = 0
+        pools = self.adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is not None:
+                connections += pool.num_connections
+                pooled_requests += pool.num_requests
+        
+        with self._lock:
+            return {
+                "requests": self._request_count,
+                "connections_opened": connections,
+                "connections_reused": max(pooled_requests - connections, 0),
+                "bytes_received": self._bytes_received,
+                "bytes_decoded": self._bytes_decoded,
+            }
+    
+    def log_stats(self):
+        stats = self.stats()
+        logger.info(f"HTTP client: {stats['requests']} requests, {stats['connections_opened']} connections opened, "
+                    f"{stats['connections_reused']} reused, {stats['bytes_received'] / 1024:.0f}KB received "
+                    f"({stats['bytes_decoded'] / 1024:.0f}KB decoded)")
+    
+    def close(self):
+        self.session.close()
+
+
+def get_ffmpeg_exe():
+    """Locate the FFmpeg binary, preferring the one bundled with imageio_ffmpeg"""
+    try:
+        import imageio_ffmpeg
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except ImportError:
+        # If imageio_ffmpeg is not installed, try to use system ffmpeg
+        return "ffmpeg"
+
+
+def watermark_filter(watermark_text):
+    """Build the FFmpeg filter chain that draws the watermark bar and text"""
+    return (f"drawbox=x=0:y=ih-40:w=iw:h=40:color=black@0.5:t=fill,"
+            f"drawtext=text='{watermark_text}':x=(w-text_w)/2:y=main_h-20:fontcolor=white:fontsize=24")
+
+
+def encoding_args(profile=DEFAULT_ENCODING_PROFILE):
+    """Build the FFmpeg video encoder arguments for a named encoding profile"""
+    if profile not in ENCODING_PROFILES:
+        raise ValueError(f"Unknown encoding profile: {profile} (available: {', '.join(ENCODING_PROFILES)})")
+    
+    settings = ENCODING_PROFILES[profile]
+    args = [
+        "-codec:v", "libx264",
+        "-preset", settings["preset"],
+        "-crf", str(settings["crf"]),
+        "-threads", str(settings["threads"])
+    ]
+    if settings.get("tune"):
+        args += ["-tune", settings["tune"]]
+    return args
+
+
+FormatSelection = namedtuple("FormatSelection", ["format_spec", "format_ids", "short_side", "estimated_size"])
+
+
+def format_short_side(fmt):
+    """Shorter side of a format's picture (its height when the width is unknown)"""
+    width, height = fmt.get('width'), fmt.get('height')
+    return min(width, height) if width and height else height or 0
+
+
+def format_size(fmt, duration):
+    """Reported or bitrate-estimated size of a format in bytes, or None"""
+    size = fmt.get('filesize') or fmt.get('filesize_approx')
+    if not size and fmt.get('tbr') and duration:
+        size = fmt['tbr'] * 1000 / 8 * duration
+    return int(size) if size else None
+
+
+def select_download_format(info, platforms, targets=PLATFORM_FORMAT_TARGETS, progressive_only=False):
+    """
+    Pick the smallest download from a video's probed formats that meets every platform's target
+    
+    Candidates are progressive MP4s and, unless progressive_only (FFmpeg reading from a pipe
+    needs a single stream), H.264 video-only DASH streams merged with the smallest M4A audio
+    stream that meets the audio bitrate target. If nothing reaches the target resolution, the
+    sharpest candidate is used. H.264 keeps merged files valid MP4s that any FFmpeg build decodes.
+    
+    Returns:
+        FormatSelection whose format_spec falls back to DOWNLOAD_FORMAT if the chosen format IDs
+        are gone when the video is downloaded (or is just DOWNLOAD_FORMAT without usable formats)
+    """
+    platform_targets = [targets[platform] for platform in platforms if platform in targets]
+    target_short_side = max((target.get("short_side", 0) for target in platform_targets), default=0)
+    target_abr = max((target.get("abr", 0) for target in platform_targets), default=0)
+    duration = info.get('duration')
+    
+    progressive, video_only, audio_only = [], [], []
+    for fmt in info.get('formats') or []:
+        has_video = fmt.get('vcodec', 'none') != 'none'
+        has_audio = fmt.get('acodec', 'none') != 'none'
+        if not fmt.get('format_id'):
+            continue
+        if has_video and has_audio and fmt.get('ext') == 'mp4':
+            progressive.append(fmt)
+        elif has_video and not has_audio and fmt.get('ext') == 'mp4' and fmt['vcodec'].startswith('avc1'):
+            video_only.append(fmt)
+        elif has_audio and not has_video and fmt.get('ext') == 'm4a':
+            audio_only.append(fmt)
+    
+    candidates = [((fmt['format_id'],), format_short_side(fmt), format_size(fmt, duration)) for fmt in progressive]
+    if audio_only and not progressive_only:
+        audio_bitrate = lambda fmt: fmt.get('abr') or fmt.get('tbr') or 0
+        good_enough = [fmt for fmt in audio_only if audio_bitrate(fmt) >= target_abr]
+        audio = (min(good_enough, key=audio_bitrate) if good_enough else max(audio_only, key=audio_bitrate))
+        audio_size = format_size(audio, duration)
+        for fmt in video_only:
+            video_size = format_size(fmt, duration)
+            size = video_size + audio_size if video_size and audio_size else None
+            candidates.append(((fmt['format_id'], audio['format_id']), format_short_side(fmt), size))
+    
+    if not candidates:
+        return FormatSelection(DOWNLOAD_FORMAT, (), None, None)
+    
+    meeting_target = [candidate for candidate in candidates if candidate[1] >= target_short_side]
+    if meeting_target:
+        format_ids, short_side, size = min(meeting_target, key=lambda c: (c[2] or float('inf'), c[1]))
+    else:
+        format_ids, short_side, size = min(candidates, key=lambda c: (-c[1], c[2] or float('inf')))
+    return FormatSelection(f"{'+'.join(format_ids)}/{DOWNLOAD_FORMAT}", format_ids, short_side, size)
+
+
+def estimated_download_size(info, platforms):
+    """Approximate bytes the download selected for platforms will transfer, or None if unknown"""
+    selection = select_download_format(info, platforms)
+    return selection.estimated_size or info.get('filesize') or info.get('filesize_approx')
+
+
+def media_limit_violations(info, platforms, limits=PLATFORM_MEDIA_LIMITS):
+    """
+    Reasons a probed video does not fit the platforms it would be uploaded to
+    
+    Returns:
+        List of "<platform>: <reason>" strings, empty if the video fits every platform
+    """
+    if info.get('live_status') in ('is_live', 'is_upcoming'):
+        return [f"{info['live_status'].replace('_', ' ')} stream"]
+    
+    duration = info.get('duration')
+    size = estimated_download_size(info, platforms)
+    height = max([fmt.get('height') or 0 for fmt in info.get('formats') or []] + [info.get('height') or 0])
+    
+    violations = []
+    for platform in platforms:
+        platform_limits = limits.get(platform, {})
+        max_duration = platform_limits.get("max_duration")
+        max_filesize = platform_limits.get("max_filesize")
+        min_height = platform_limits.get("min_height")
+        if max_duration and duration and duration > max_duration:
+            violations.append(f"{platform}: {duration:.0f}s is longer than {max_duration}s")
+        if max_filesize and size and size > max_filesize:
+            violations.append(f"{platform}: ~{size / 1024 ** 2:.0f}MB is larger than {max_filesize / 1024 ** 2:.0f}MB")
+        if min_height and height and height < min_height:
+            violations.append(f"{platform}: {height}p is below {min_height}p")
+    return violations
+
+
+def extract_video_id(video_url):
+    """Extract the video ID from a YouTube watch URL"""
+    return video_url.split("=")[-1].split("&")[0]
+
+
+VideoRecord = namedtuple("VideoRecord", ["video_id", "title", "channel_id", "channel_url"])
+ChannelRecord = namedtuple("ChannelRecord", ["channel_id", "title", "channel_url"])
+
+YT_INITIAL_DATA_MARKERS = ("var ytInitialData = ", 'window["ytInitialData"] = ', "ytInitialData = ")
+VIDEO_RENDERER_KEYS = ("videoRenderer", "gridVideoRenderer", "compactVideoRenderer")
+
+_json_decoder = json.JSONDecoder()
+
+
+def extract_yt_initial_data(html):
+    """
+    Locate the ytInitialData blob with a plain string search and decode only that JSON.
+    Returns None if the page does not embed it (callers fall back to the HTML parser).
+    """
+    for marker in YT_INITIAL_DATA_MARKERS:
+        start = html.find(marker)
+        while start != -1:
+            try:
+                data, _ = _json_decoder.raw_decode(html, start + len(marker))
+                if isinstance(data, dict):
+                    return data
+            except ValueError:
+                pass
+            start = html.find(marker, start + len(marker))
+    return None
+
+
+def _renderer_text(value):
+    """Read a YouTube text object ({"simpleText": ...} or {"runs": [...]})"""
+    if not isinstance(value, dict):
+        return None
+    if "simpleText" in value:
+        return value["simpleText"]
+    runs = value.get("runs") or []
+    return "".join(run.get("text", "") for run in runs) or None
+
+
+def _renderer_channel(renderer):
+    """Read the owning channel's ID and URL from a video renderer's byline"""
+    for key in ("ownerText", "longBylineText", "shortBylineText"):
+        runs = (renderer.get(key) or {}).get("runs") or []
+        for run in runs:
+            browse = run.get("navigationEndpoint", {}).get("browseEndpoint", {})
+            if browse.get("browseId"):
+                base_url = browse.get("canonicalBaseUrl")
+                channel_url = f"https://www.youtube.com{base_url}" if base_url else None
+                return browse["browseId"], channel_url
+    return None, None
+
+
+def iter_initial_data_records(data):
+    """
+    Walk ytInitialData in document order and yield VideoRecord/ChannelRecord tuples.
+    Video renderers and channel renderers become full records; any other object carrying
+    a "videoId" still yields a bare VideoRecord so nothing the old regex matched is lost.
+    """
+    stack = [data]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, list):
+            stack.extend(reversed(node))
+            continue
+        if not isinstance(node, dict):
+            continue
+
+        renderer_key = next((key for key in VIDEO_RENDERER_KEYS if key in node), None)
+        if renderer_key and isinstance(node[renderer_key], dict):
+            renderer = node[renderer_key]
+            if renderer.get("videoId"):
+                channel_id, channel_url = _renderer_channel(renderer)
+                yield VideoRecord(renderer["videoId"], _renderer_text(renderer.get("title")),
+                                  channel_id, channel_url)
+                continue
+
+        channel_renderer = node.get("channelRenderer")
+        if isinstance(channel_renderer, dict) and channel_renderer.get("channelId"):
+            base_url = (channel_renderer.get("navigationEndpoint", {})
+                        .get("browseEndpoint", {}).get("canonicalBaseUrl"))
+            yield ChannelRecord(channel_renderer["channelId"],
+                                _renderer_text(channel_renderer.get("title")),
+                                f"https://www.youtube.com{base_url}" if base_url else None)
+            continue
+
+        if isinstance(node.get("videoId"), str):
+            yield VideoRecord(node["videoId"], None, None, None)
+        stack.extend(reversed(list(node.values())))
+
+
+class VideoLinkAccumulator:
+    """
+    Insertion-ordered, de-duplicated collection of scraped video records keyed by video ID.
+    Membership checks are O(1), so collecting thousands of IDs from a page stays linear.
+    """
+
+    def __init__(self):
+        self._records = {}
+
+    def add(self, record):
+        """Add a VideoRecord unless its video ID was already seen; returns whether it was added"""
+        if record.video_id in self._records:
+            return False
+        self._records[record.video_id] = record
+        return True
+
+    def add_id(self, video_id):
+        """Add a bare video ID"""
+        return self.add(VideoRecord(video_id, None, None, None))
+
+    def __contains__(self, video_id):
+        return video_id in self._records
+
+    def __len__(self):
+        return len(self._records)
+
+    def records(self):
+        return list(self._records.values())
+
+    def urls(self):
+        return [f"https://www.youtube.com/watch?v={video_id}" for video_id in self._records]
+
+
+def extract_page_records(html):
+    """
+    Extract video and channel records from a YouTube search or channel page.
+    Returns (videos, channels), or None when the page has no ytInitialData blob.
+    """
+    data = extract_yt_initial_data(html)
+    if data is None:
+        return None
+    videos, channels = [], []
+    for record in iter_initial_data_records(data):
+        (videos if isinstance(record, VideoRecord) else channels).append(record)
+    return videos, channels
+
+
+def connect_sqlite(db_file):
+    """
+    Open a SQLite connection that can be shared between threads and with worker processes
+    (WAL journal so readers don't block the writer, and a generous busy timeout)
+    """
+    conn = sqlite3.connect(db_file, check_same_thread=False, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    return conn
+
+
+def file_fingerprint(file_path, sample_size=1024 * 1024):
+    """Content hash of a media file from its size and its first and last sample_size bytes"""
+    digest = hashlib.sha256()
+    size = os.path.getsize(file_path)
+    digest.update(str(size).encode())
+    with open(file_path, 'rb') as f:
+        digest.update(f.read(sample_size))
+        if size > sample_size:
+            f.seek(max(size - sample_size, sample_size))
+            digest.update(f.read(sample_size))
+    return digest.hexdigest()
+
+
+def temp_output_path(output_path):
+    """
+    Sibling temp file for a writer to fill before os.replace moves it over output_path
+    
+    Output names come from video titles, so output_path may be a hard link to another video's
+    media cache entry; writing it in place would overwrite that entry.
+    """
+    name, ext = os.path.splitext(output_path)
+    return f"{name}.{os.getpid()}.{threading.get_ident()}.tmp{ext}"
+
+
+def write_json_atomic(path, data, **dump_kwargs):
+    """Write JSON to a temp file and move it over path, so readers never see a half-written file"""
+    temp_path = temp_output_path(path)
+    try:
+        with open(temp_path, 'w') as f:
+            json.dump(data, f, **dump_kwargs)
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+class InterProcessLock:
+    """
+    Exclusive lock on a "<path>.lock" file, held around read-modify-writes of state files that
+    worker processes share
+    
+    Locks from separate instances exclude each other even within one process; an instance
+    itself is not reentrant, so create one per use or guard it with a thread lock. Does
+    nothing where fcntl is unavailable.
+    
+    Args:
+        path: State file the lock guards
+    """
+    def __init__(self, path):
+        self.lock_path = path + ".lock"
+        self._lock_file = None
+    
+    def acquire(self):
+        if fcntl is None:
+            return
+        lock_file = open(self.lock_path, "w")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        except BaseException:
+            lock_file.close()
+            raise
+        self._lock_file = lock_file
+    
+    def release(self):
+        if self._lock_file is None:
+            return
+        lock_file, self._lock_file = self._lock_file, None
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+        finally:
+            lock_file.close()
+    
+    def __enter__(self):
+        self.acquire()
+        return self
+    
+    def __exit__(self, exc_type, exc_value, tb):
+        self.release()
+
+
+class MediaCache:
+    """
+    Content-addressed store of downloaded and watermarked files, bounded in size with LRU eviction
+    
+    Entries are named after a hash of everything that determines their content (video ID and
+    format for downloads; source fingerprint, watermark filter and encoder settings for
+    watermarked copies). Files move in and out of the cache as hard links, so working copies
+    can be deleted after upload without touching the cache and nothing is copied on a hit.
+    Writers must therefore never rewrite a working copy in place: they write a temp file and
+    os.replace it over the working copy (see temp_output_path), which leaves the entry intact.
+    
+    Args:
+        cache_dir: Directory holding the entries
+        max_bytes: Total size above which the least recently used entries are evicted
+    """
+    def __init__(self, cache_dir, max_bytes=MEDIA_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+    
+    @staticmethod
+    def key(kind, **params):
+        """Cache key for a file of the given kind produced with params"""
+        payload = json.dumps({"kind": kind, **params}, sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()[:32]
+    
+    def _entry_path(self, key, ext):
+        return os.path.join(self.cache_dir, f"{key}{ext}")
+    
+    @staticmethod
+    def _link(source_path, dest_path):
+        try:
+            os.link(source_path, dest_path)
+        except OSError:
+            # Different filesystem (or no hard link support): fall back to a copy
+            shutil.copy2(source_path, dest_path)
+    
+    def contains(self, key, ext):
+        return os.path.exists(self._entry_path(key, ext))
+    
+    def restore(self, key, dest_path):
+        """Place the cached entry for key at dest_path; returns dest_path on a hit, None on a miss"""
+        entry_path = self._entry_path(key, os.path.splitext(dest_path)[1])
+        with self._lock:
+            if not os.path.exists(entry_path):
+                return None
+            os.utime(entry_path)  # Mark as recently used
+            if os.path.exists(dest_path):
+                if os.path.samefile(entry_path, dest_path):
+                    return dest_path
+                os.remove(dest_path)
+            self._link(entry_path, dest_path)
+        logger.info(f"Media cache hit for {os.path.basename(dest_path)}")
+        return dest_path
+    
+    def store(self, source_path, key):
+        """Add a finished file to the cache under key, then evict down to max_bytes"""
+        entry_path = self._entry_path(key, os.path.splitext(source_path)[1])
+        temp_path = f"{entry_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            self._link(source_path, temp_path)
+            os.replace(temp_path, entry_path)
+        except OSError as e:
+            logger.warning(f"Could not add {source_path} to the media cache: {e}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            return
+        self.evict()
+    
+    def evict(self):
+        """Remove least recently used entries until the cache fits in max_bytes"""
+        with self._lock:
+            entries = []
+            for entry in os.scandir(self.cache_dir):
+                if entry.is_file() and not entry.name.endswith(".tmp"):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+    
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    total -= size
+                    logger.info(f"Evicted {os.path.basename(path)} from the media cache")
+                except OSError as e:
+                    logger.warning(f"Could not evict {path}: {e}")
+
+
+class YoutubeDLPool:
+    """
+    Long-lived yt_dlp.YoutubeDL instances, pooled per option profile
+    
+    Building a YoutubeDL sets up its extractors, cookie jar and HTTP handlers; reusing one
+    across calls skips that work. An instance is only ever used by one caller at a time, and
+    one that raised is closed rather than returned to the pool.
+    
+    Args:
+        profiles: {profile name: callable returning the ydl_opts for a new instance}
+        size: Maximum number of instances per profile
+    """
+    def __init__(self, profiles, size=YTDL_POOL_SIZE):
+        self.profiles = profiles
+        self.size = size
+        self._lock = threading.Lock()
+        self._idle = {profile: [] for profile in profiles}
+        self._slots = {profile: threading.BoundedSemaphore(size) for profile in profiles}
+        self.created = defaultdict(int)
+        self.reused = defaultdict(int)
+    
+    @contextmanager
+    def acquire(self, profile):
+        """Borrow an instance of profile, creating one if none is idle"""
+        self._slots[profile].acquire()
+        ydl = None
+        healthy = False
+        try:
+            # Created inside the try, so a failing constructor still gives back the slot
+            with self._lock:
+                ydl = self._idle[profile].pop() if self._idle[profile] else None
+            if ydl is None:
+                ydl = yt_dlp.YoutubeDL(self.profiles[profile]())
+                self.created[profile] += 1
+            else:
+                self.reused[profile] += 1
+            
+            yield ydl
+            healthy = True
+        except GeneratorExit:
+            # A generator holding the instance was closed early; the instance itself is fine
+            healthy = True
+            raise
+        finally:
+            if ydl is not None:
+                if healthy:
+                    with self._lock:
+                        self._idle[profile].append(ydl)
+                else:
+                    ydl.close()
+            self._slots[profile].release()
+    
+    def close(self):
+        with self._lock:
+            for instances in self._idle.values():
+                for ydl in instances:
+                    ydl.close()
+                instances.clear()
+
+
+ContentMatch = namedtuple("ContentMatch", ["group", "field", "term"])
+ContentVerdict = namedtuple("ContentVerdict", ["video_id", "relevant", "copyrighted", "matches"])
+
+
+class ContentFilter:
+    """
+    Relevance and copyright classifier for video metadata
+    
+    The indicator terms are lowercased once up front, and each title and description is
+    lowercased once per classification instead of once per check. A video is relevant when a
+    subject term and a context term appear in its title or description, and copyrighted when a
+    copyright term appears in its description. Each group stops at its first matching term,
+    which is reported back as the reason. Terms match as substrings, like the checks this
+    replaces; CPython's substring search outruns a compiled alternation regex on texts this
+    size (see the content-filter benchmark).
+    
+    Args:
+        subject_terms: Terms naming the subject (at least one must match)
+        context_terms: Terms naming the kind of content (at least one must match)
+        copyright_terms: Terms marking a copyright notice
+    """
+    # Fields each term group is searched in, in order
+    GROUP_FIELDS = {
+        "subject": ("title", "description"),
+        "context": ("title", "description"),
+        "copyright": ("description",),
+    }
+    
+    def __init__(self, subject_terms=RELEVANCE_SUBJECT_TERMS, context_terms=RELEVANCE_CONTEXT_TERMS,
+                 copyright_terms=COPYRIGHT_TERMS):
+        self.terms = {
+            "subject": tuple(term.lower() for term in subject_terms),
+            "context": tuple(term.lower() for term in context_terms),
+            "copyright": tuple(term.lower() for term in copyright_terms),
+        }
+    
+    def _first_match(self, group, texts):
+        for field in self.GROUP_FIELDS[group]:
+            text = texts[field]
+            for term in self.terms[group]:
+                if term in text:
+                    return ContentMatch(group, field, term)
+        return None
+    
+    def classify(self, info):
+        """Classify one metadata dict (with 'id', 'title' and 'description')"""
+        texts = {
+            "title": (info.get("title") or "").lower(),
+            "description": (info.get("description") or "").lower(),
+        }
+        subject = self._first_match("subject", texts)
+        context = self._first_match("context", texts) if subject else None
+        copyright_match = self._first_match("copyright", texts)
+        return ContentVerdict(
+            video_id=info.get("id"),
+            relevant=context is not None,
+            copyrighted=copyright_match is not None,
+            matches=tuple(match for match in (subject, context, copyright_match) if match),
+        )
+    
+    def classify_batch(self, infos):
+        """Classify a batch of metadata dicts, returning verdicts in the same order"""
+        return [self.classify(info) for info in infos]
+    
+    @staticmethod
+    def reason(verdict, group):
+        """The matched term of a group, for log messages"""
+        return next((match.term for match in verdict.matches if match.group == group), None)
+
+
+class VideoMetadataCache:
+    """
+    On-disk cache of yt-dlp video metadata keyed by video ID, with an in-memory LRU in front
+    
+    Args:
+        db_file: SQLite file holding the cached metadata
+        ttl: Seconds after which an entry is considered stale and evicted
+        memory_size: Number of entries kept in memory
+    """
+    # Top-level fields kept from extract_info results (the full result is mostly format URLs)
+    INFO_FIELDS = (
+        'id', 'title', 'description', 'duration', 'channel', 'channel_id', 'channel_url',
+        'uploader', 'uploader_id', 'uploader_url', 'upload_date', 'view_count', 'tags',
+        'width', 'height', 'fps', 'ext', 'filesize', 'filesize_approx', 'live_status'
+    )
+    FORMAT_FIELDS = (
+        'format_id', 'ext', 'width', 'height', 'fps', 'vcodec', 'acodec',
+        'tbr', 'vbr', 'abr', 'filesize', 'filesize_approx', 'protocol'
+    )
+    
+    def __init__(self, db_file=METADATA_CACHE_FILE, ttl=METADATA_CACHE_TTL, memory_size=METADATA_CACHE_MEMORY_SIZE):
+        self.ttl = ttl
+        self.memory_size = memory_size
+        self._memory = OrderedDict()  # video_id -> (fetched_at, info)
+        self._lock = threading.Lock()
+        self._conn = connect_sqlite(db_file)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS video_metadata ("
+            "video_id TEXT PRIMARY KEY, fetched_at REAL NOT NULL, info TEXT NOT NULL)"
+        )
+        self._conn.commit()
+        self.evict_expired()
+    
+    @classmethod
+    def slim_info(cls, info):
+        """Reduce an extract_info result to the fields we actually use"""
+        slim = {key: info[key] for key in cls.INFO_FIELDS if info.get(key) is not None}
+        slim['formats'] = [
+            {key: fmt[key] for key in cls.FORMAT_FIELDS if fmt.get(key) is not None}
+            for fmt in info.get('formats') or []
+        ]
+        return slim
+    
+    def get(self, video_id):
+        """Return cached metadata for a video, or None if missing or expired"""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(video_id)
+            if entry is None:
+                row = self._conn.execute(
+                    "SELECT fetched_at, info FROM video_metadata WHERE video_id = ?", (video_id,)
+                ).fetchone()
+                if row is None:
+                    return None
+                entry = (row[0], json.loads(row[1]))
+            
+            if now - entry[0] > self.ttl:
+                self._memory.pop(video_id, None)
+                self._conn.execute("DELETE FROM video_metadata WHERE video_id = ?", (video_id,))
+                self._conn.commit()
+                return None
+            
+            self._remember(video_id, entry)
+            return entry[1]
+    
+    def put(self, video_id, info):
+        """Store metadata for a video and return the slimmed copy"""
+        slim = self.slim_info(info)
+        entry = (time.time(), slim)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO video_metadata (video_id, fetched_at, info) VALUES (?, ?, ?)",
+                (video_id, entry[0], json.dumps(slim))
+            )
+            self._conn.commit()
+            self._remember(video_id, entry)
+        return slim
+    
+    def evict_expired(self):
+        """Remove stale entries from disk"""
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM video_metadata WHERE fetched_at < ?", (time.time() - self.ttl,))
+            self._conn.commit()
+        if cursor.rowcount:
+            logger.info(f"Evicted {cursor.rowcount} expired metadata cache entries")
+    
+    def _remember(self, video_id, entry):
+        """Insert into the in-memory LRU, dropping the least recently used entry when full"""
+        self._memory[video_id] = entry
+        self._memory.move_to_end(video_id)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+
+class DownloadHistoryStore:
+    """
+    Set of downloaded video IDs held in memory and backed by an indexed SQLite table
+    
+    Membership checks never touch the disk and each new ID is a single insert, instead of
+    rewriting the whole history file. On first use the IDs from the legacy JSON history
+    are imported once; the JSON file itself is left untouched.
+    
+    When several processes share the file, IDs missing from memory are looked up in the
+    table as well, and add() is an atomic claim: only the process whose insert landed
+    gets True.
+    
+    Args:
+        db_file: SQLite file holding the history
+        legacy_json_file: Old download_history.json to migrate from
+        shared: Check the table for IDs added by other processes
+    """
+    def __init__(self, db_file, legacy_json_file=None, shared=False):
+        self.shared = shared
+        self._lock = threading.Lock()
+        self._conn = connect_sqlite(db_file)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS downloaded_videos ("
+            "video_id TEXT PRIMARY KEY, downloaded_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE TABLE IF NOT EXISTS history_meta (key TEXT PRIMARY KEY, value TEXT)")
+        self._conn.commit()
+        
+        if legacy_json_file:
+            self._migrate_from_json(legacy_json_file)
+        
+        self._ids = {row[0] for row in self._conn.execute("SELECT video_id FROM downloaded_videos")}
+        logger.info(f"Loaded download history with {len(self._ids)} videos")
+    
+    def _migrate_from_json(self, json_file):
+        """Import IDs from the legacy JSON history once"""
+        migrated = self._conn.execute(
+            "SELECT value FROM history_meta WHERE key = 'migrated_from'"
+        ).fetchone()
+        if migrated or not os.path.exists(json_file):
+            return
+        
+        try:
+            with open(json_file, 'r') as f:
+                video_ids = json.load(f).get("downloaded_video_ids", [])
+        except (OSError, ValueError) as e:
+            logger.error(f"Could not read legacy download history {json_file}: {e}")
+            return
+        
+        now = time.time()
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO downloaded_videos (video_id, downloaded_at) VALUES (?, ?)",
+                [(video_id, now) for video_id in video_ids]
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO history_meta (key, value) VALUES ('migrated_from', ?)", (json_file,)
+            )
+        logger.info(f"Migrated {len(video_ids)} video IDs from {json_file}")
+    
+    def __contains__(self, video_id):
+        if video_id in self._ids:
+            return True
+        if not self.shared:
+            return False
+        with self._lock:
+            found = self._conn.execute(
+                "SELECT 1 FROM downloaded_videos WHERE video_id = ?", (video_id,)
+            ).fetchone() is not None
+            if found:
+                self._ids.add(video_id)
+            return found
+    
+    def __len__(self):
+        return len(self._ids)
+    
+    def add(self, video_id):
+        """Record a video ID, returning True if it was not already in the history"""
+        with self._lock:
+            if video_id in self._ids:
+                return False
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO downloaded_videos (video_id, downloaded_at) VALUES (?, ?)",
+                (video_id, time.time())
+            )
+            self._conn.commit()
+            self._ids.add(video_id)
+            return cursor.rowcount == 1
+    
+    def discard(self, video_id):
+        """Remove a video ID, e.g. to give up a claim after a failed download"""
+        with self._lock:
+            self._conn.execute("DELETE FROM downloaded_videos WHERE video_id = ?", (video_id,))
+            self._conn.commit()
+            self._ids.discard(video_id)
+
+
+class ChannelRegistry:
+    """
+    Persistent registry of source channels and of the search results already checked
+    
+    Discovery only probes search results it has not seen before, and the processing loop
+    reads its channel list from here instead of searching at every startup.
+    
+    Args:
+        db_file: SQLite file holding the registry
+        max_failures: Consecutive processing failures before a channel is left out
+        failure_cooldown: Seconds after its last failure before a left out channel gets another try
+    """
+    def __init__(self, db_file=CHANNEL_REGISTRY_FILE, max_failures=CHANNEL_MAX_FAILURES,
+                 failure_cooldown=CHANNEL_FAILURE_COOLDOWN):
+        self.max_failures = max_failures
+        self.failure_cooldown = failure_cooldown
+        self._lock = threading.Lock()
+        self._conn = connect_sqlite(db_file)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS channels ("
+            "channel_url TEXT PRIMARY KEY, channel_id TEXT, channel_name TEXT, "
+            "relevance INTEGER NOT NULL DEFAULT 0, video_count INTEGER, "
+            "failure_count INTEGER NOT NULL DEFAULT 0, last_failure REAL, "
+            "first_seen REAL NOT NULL, last_seen REAL NOT NULL)"
+        )
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(channels)")]
+        if "last_failure" not in columns:
+            self._conn.execute("ALTER TABLE channels ADD COLUMN last_failure REAL")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS channels_by_id ON channels (channel_id)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS checked_search_results (video_id TEXT PRIMARY KEY, checked_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+    
+    def add_channel(self, channel_url, channel_id=None, channel_name=None, relevance=0):
+        """Register a channel, or refresh its last-seen time and add to its relevance if known"""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO channels (channel_url, channel_id, channel_name, relevance, first_seen, last_seen) "
+                "VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(channel_url) DO UPDATE SET "
+                "channel_id = COALESCE(excluded.channel_id, channel_id), "
+                "channel_name = COALESCE(excluded.channel_name, channel_name), "
+                "relevance = relevance + excluded.relevance, last_seen = excluded.last_seen",
+                (channel_url, channel_id, channel_name, relevance, now, now)
+            )
+    
+    def has_channel_id(self, channel_id):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT 1 FROM channels WHERE channel_id = ?", (channel_id,)
+            ).fetchone() is not None
+    
+    def touch_channel_id(self, channel_id):
+        """Note another relevant search hit for an already registered channel"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE channels SET relevance = relevance + 1, last_seen = ? WHERE channel_id = ?",
+                (time.time(), channel_id)
+            )
+    
+    def set_video_count(self, channel_url, video_count):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE channels SET video_count = ? WHERE channel_url = ?", (video_count, channel_url)
+            )
+    
+    def record_result(self, channel_url, success):
+        """Reset the failure count after a successful run, or add one after a failed run"""
+        with self._lock, self._conn:
+            if success:
+                self._conn.execute(
+                    "UPDATE channels SET failure_count = 0, last_failure = NULL WHERE channel_url = ?", (channel_url,)
+                )
+            else:
+                self._conn.execute(
+                    "UPDATE channels SET failure_count = failure_count + 1, last_failure = ? WHERE channel_url = ?",
+                    (time.time(), channel_url)
+                )
+    
+    def channel_urls(self):
+        """
+        Channels below the failure limit, or past the cooldown since their last failure,
+        most relevant and most recently seen first
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT channel_url FROM channels WHERE failure_count < ? OR COALESCE(last_failure, 0) < ? "
+                "ORDER BY relevance DESC, last_seen DESC", (self.max_failures, time.time() - self.failure_cooldown)
+            ).fetchall()
+        return [row[0] for row in rows]
+    
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM channels").fetchone()[0]
+    
+    def is_search_result_checked(self, video_id):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT 1 FROM checked_search_results WHERE video_id = ?", (video_id,)
+            ).fetchone() is not None
+    
+    def mark_search_result_checked(self, video_id):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO checked_search_results (video_id, checked_at) VALUES (?, ?)",
+                (video_id, time.time())
+            )
+
+
+class VideoJobStore:
+    """
+    Durable per-video job table recording how far each video got through the pipeline
+    
+    Jobs are created once a candidate passed its checks, so stages run probed -> downloaded ->
+    watermarked -> uploaded_<platform> -> done, with failed for jobs that ran out of attempts. The paths and metadata each stage produced are
+    stored with the job, so after a crash a worker picks the video up at its last completed stage.
+    
+    Args:
+        db_file: SQLite file holding the jobs
+    """
+    STAGES = ("probed", "downloaded", "watermarked", "uploaded_youtube", "uploaded_tiktok", "done", "failed")
+    FINISHED_STAGES = ("done", "failed")
+    
+    def __init__(self, db_file=JOB_STORE_FILE):
+        self._lock = threading.Lock()
+        self._conn = connect_sqlite(db_file)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS video_jobs ("
+            "video_id TEXT PRIMARY KEY, video_url TEXT NOT NULL, channel_url TEXT, stage TEXT NOT NULL, "
+            "video_data TEXT, watermarked_paths TEXT, uploaded_platforms TEXT NOT NULL DEFAULT '[]', "
+            "attempts INTEGER NOT NULL DEFAULT 0, error TEXT, claimed_by TEXT, "
+            "created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+        )
+        columns = [row["name"] for row in self._conn.execute("PRAGMA table_info(video_jobs)")]
+        if "claimed_by" not in columns:
+            self._conn.execute("ALTER TABLE video_jobs ADD COLUMN claimed_by TEXT")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS video_jobs_by_stage ON video_jobs (stage, updated_at)")
+        self._conn.commit()
+    
+    @staticmethod
+    def _to_job(row):
+        if row is None:
+            return None
+        job = dict(row)
+        job["video_data"] = json.loads(job["video_data"]) if job["video_data"] else None
+        job["watermarked_paths"] = json.loads(job["watermarked_paths"]) if job["watermarked_paths"] else None
+        job["uploaded_platforms"] = json.loads(job["uploaded_platforms"])
+        return job
+    
+    def _get(self, video_id):
+        return self._to_job(self._conn.execute("SELECT * FROM video_jobs WHERE video_id = ?", (video_id,)).fetchone())
+    
+    def get(self, video_id):
+        with self._lock:
+            return self._get(video_id)
+    
+    def create(self, video_id, video_url, channel_url, stage="probed"):
+        """Start a job for a video (restarting it if an earlier job for the same video failed)"""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO video_jobs (video_id, video_url, channel_url, stage, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(video_id) DO UPDATE SET stage = excluded.stage, attempts = 0, error = NULL, "
+                "video_data = NULL, watermarked_paths = NULL, uploaded_platforms = '[]', claimed_by = NULL, "
+                "updated_at = excluded.updated_at WHERE stage = 'failed'",
+                (video_id, video_url, channel_url, stage, now, now)
+            )
+            return self._get(video_id)
+    
+    def advance(self, video_id, stage, video_data=None, watermarked_paths=None):
+        """Move a job to a stage, storing the stage's output alongside it"""
+        if stage not in self.STAGES:
+            raise ValueError(f"Unknown job stage: {stage}")
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE video_jobs SET stage = ?, "
+                "video_data = COALESCE(?, video_data), watermarked_paths = COALESCE(?, watermarked_paths), "
+                "updated_at = ? WHERE video_id = ?",
+                (stage, json.dumps(video_data) if video_data is not None else None,
+                 json.dumps(watermarked_paths) if watermarked_paths is not None else None,
+                 time.time(), video_id)
+            )
+            return self._get(video_id)
+    
+    def record_claim(self, video_id, run_id):
+        """Note that run_id claimed the video in the download history for this job"""
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE video_jobs SET claimed_by = ?, updated_at = ? WHERE video_id = ?",
+                               (run_id, time.time(), video_id))
+            return self._get(video_id)
+    
+    def mark_uploaded(self, video_id, platform, platforms):
+        """Record one platform's upload; the job is done once every platform in platforms has it"""
+        with self._lock, self._conn:
+            job = self._get(video_id)
+            uploaded = sorted(set(job["uploaded_platforms"]) | {platform})
+            stage = "done" if set(platforms) <= set(uploaded) else f"uploaded_{platform}"
+            self._conn.execute(
+                "UPDATE video_jobs SET stage = ?, uploaded_platforms = ?, updated_at = ? WHERE video_id = ?",
+                (stage, json.dumps(uploaded), time.time(), video_id)
+            )
+            return self._get(video_id)
+    
+    def record_failure(self, video_id, error, max_attempts=JOB_MAX_ATTEMPTS):
+        """Count a failed attempt, marking the job failed once it reaches max_attempts"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE video_jobs SET attempts = attempts + 1, error = ?, updated_at = ?, "
+                "stage = CASE WHEN attempts + 1 >= ? THEN 'failed' ELSE stage END WHERE video_id = ?",
+                (str(error), time.time(), max_attempts, video_id)
+            )
+            return self._get(video_id)
+    
+    def unfinished(self, channel_url=None):
+        """Jobs that are neither done nor failed, oldest first"""
+        query = "SELECT * FROM video_jobs WHERE stage NOT IN (?, ?)"
+        params = list(self.FINISHED_STAGES)
+        if channel_url is not None:
+            query += " AND channel_url = ?"
+            params.append(channel_url)
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY updated_at", params).fetchall()
+        return [self._to_job(row) for row in rows]
+
+
+class StepLatencyHistogram:
+    """
+    Latency histograms for the named steps of a multi-step flow such as a TikTok upload
+    
+    Args:
+        name: Flow name used in the logged summary
+        buckets: Upper bounds (seconds) of the histogram buckets
+    """
+    def __init__(self, name, buckets=(0.5, 1, 2, 5, 10, 30, 60, 120, 300)):
+        self.name = name
+        self.buckets = buckets
+        self._samples = defaultdict(list)
+        self._lock = threading.Lock()
+    
+    @contextmanager
+    def step(self, step_name):
+        """Time the enclosed block and record it under step_name"""
+        start_time = time.monotonic()
+        try:
+            yield
+        finally:
+            self.record(step_name, time.monotonic() - start_time)
+    
+    def record(self, step_name, seconds):
+        """Record one latency sample"""
+        with self._lock:
+            self._samples[step_name].append(seconds)
+    
+    def histogram(self, step_name):
+        """Return (bucket label, count) pairs for a step"""
+        with self._lock:
+            samples = list(self._samples[step_name])
+        
+        counts = [0] * (len(self.buckets) + 1)
+        for sample in samples:
+            for i, bound in enumerate(self.buckets):
+                if sample <= bound:
+                    counts[i] += 1
+                    break
+            else:
+                counts[-1] += 1
+        labels = [f"<={bound}s" for bound in self.buckets] + [f">{self.buckets[-1]}s"]
+        return list(zip(labels, counts))
+    
+    def log_summary(self):
+        """Log count, median, p95 and histogram per step"""
+        with self._lock:
+            steps = {name: list(samples) for name, samples in self._samples.items() if samples}
+        
+        for step_name, samples in steps.items():
+            last = samples[-1]
+            samples.sort()
+            median = samples[len(samples) // 2]
+            p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+            buckets = ", ".join(f"{label}: {count}" for label, count in self.histogram(step_name) if count)
+            logger.info(f"{self.name} step '{step_name}': n={len(samples)} last={last:.2f}s "
+                        f"median={median:.2f}s p95={p95:.2f}s [{buckets}]")
+
+
+def wait_until(driver, condition, timeout, poll_frequency=0.25):
+    """Wait until condition(driver) returns something truthy and return it, or None on timeout"""
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.common.exceptions import TimeoutException
+    
+    try:
+        return WebDriverWait(driver, timeout, poll_frequency=poll_frequency).until(condition)
+    except TimeoutException:
+        return None
+
+
+def page_loaded(driver):
+    """Condition: the current document has finished loading"""
+    return driver.execute_script("return document.readyState") == "complete"
+
+
+def element_focused(element):
+    """Condition factory: the element (or one of its children) has keyboard focus"""
+    return lambda driver: driver.execute_script(
+        "return arguments[0] === document.activeElement || arguments[0].contains(document.activeElement);",
+        element
+    )
+
+
+class SelectorCache:
+    """
+    Remembers which selector last located each page element and tries it first next time
+    
+    Candidate selectors (CSS, or XPath when they start with "//") are resolved in the browser
+    with a single execute_script call instead of one find_elements round-trip per selector.
+    
+    Args:
+        cache_file: JSON file the working selectors are persisted to
+    """
+    # Returns [element, selector] for the first selector whose first match passes the checks
+    RESOLVE_SCRIPT = """
+        var selectors = arguments[0], needVisible = arguments[1], needEnabled = arguments[2];
+        function isVisible(el) {
+            var rect = el.getBoundingClientRect();
+            var style = window.getComputedStyle(el);
+            return rect.width > 0 && rect.height > 0 && style.visibility !== 'hidden' && style.display !== 'none';
+        }
+        function firstMatch(selector) {
+            try {
+                if (selector.indexOf('//') === 0) {
+                    return document.evaluate(selector, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+                }
+                return document.querySelector(selector);
+            } catch (e) {
+                return null;
+            }
+        }
+        for (var i = 0; i < selectors.length; i++) {
+            var el = firstMatch(selectors[i]);
+            if (!el || (needVisible && !isVisible(el)) || (needEnabled && el.disabled)) {
+                continue;
+            }
+            return [el, selectors[i]];
+        }
+        return null;
+    """
+    
+    def __init__(self, cache_file=TIKTOK_SELECTOR_CACHE_FILE):
+        self.cache_file = cache_file
+        self._selectors = self._load()
+    
+    def _load(self):
+        if not os.path.exists(self.cache_file):
+            return {}
+        try:
+            with open(self.cache_file, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.error(f"Could not read selector cache {self.cache_file}: {e}")
+            return {}
+    
+    def ordered(self, key, selectors):
+        """Return selectors with the one that worked last time first"""
+        cached = self._selectors.get(key)
+        if cached in selectors:
+            return [cached] + [selector for selector in selectors if selector != cached]
+        return list(selectors)
+    
+    def remember(self, key, selector):
+        """Persist the selector that located an element"""
+        if self._selectors.get(key) == selector:
+            return
+        self._selectors[key] = selector
+        try:
+            # Merge in what other worker processes learned since this one read the file
+            with InterProcessLock(self.cache_file):
+                self._selectors = {**self._load(), key: selector}
+                write_json_atomic(self.cache_file, self._selectors, indent=2)
+        except OSError as e:
+            logger.error(f"Could not save selector cache {self.cache_file}: {e}")
+    
+    def find(self, driver, key, selectors, visible=False, enabled=False):
+        """Resolve the first matching selector in one browser round-trip, returning the element or None"""
+        try:
+            result = driver.execute_script(self.RESOLVE_SCRIPT, self.ordered(key, selectors), visible, enabled)
+        except Exception as e:
+            logger.warning(f"Selector resolution for {key} failed: {e}")
+            return None
+        
+        if not result:
+            return None
+        
+        element, selector = result
+        if self._selectors.get(key) != selector:
+            logger.info(f"Found {key} via: {selector}")
+        self.remember(key, selector)
+        return element
+
+
+class TikTokBrowserSession:
+    """
+    Long-lived, logged-in Chrome session reused across TikTok uploads
+    
+    The virtual display, driver install, browser launch and cookie login are paid once
+    instead of on every upload. The browser is health-checked before each use and
+    recycled after max_uploads uploads, after sitting idle too long, or after a failure.
+    
+    Args:
+        reuploader: YouTubeChannelReuploader used to load and save TikTok cookies
+        max_uploads: Uploads served by one browser before it is restarted
+        max_idle: Seconds of inactivity after which the browser is restarted
+        shared: Whether worker processes upload to TikTok too. The account is then used by one
+            process at a time, and the browser is closed after each upload so no two
+            processes ever hold logged-in sessions (and rotate the cookies) at once.
+    """
+    def __init__(self, reuploader, max_uploads=TIKTOK_SESSION_MAX_UPLOADS, max_idle=TIKTOK_SESSION_MAX_IDLE,
+                 shared=False):
+        self.reuploader = reuploader
+        self.max_uploads = max_uploads
+        self.max_idle = max_idle
+        self.shared = shared
+        self._process_lock = InterProcessLock(TIKTOK_SESSION_LOCK_FILE) if shared else None
+        self.driver = None
+        self.display = None
+        self.uploads = 0
+        self.last_used = 0
+        self._driver_path = None
+        self._lock = threading.Lock()
+        atexit.register(self.close)
+    
+    def acquire(self):
+        """
+        Return a warm, logged-in driver for exclusive use until release() is called
+        
+        Returns None if no logged-in session could be established.
+        """
+        self._lock.acquire()
+        try:
+            if self._process_lock is not None:
+                self._process_lock.acquire()
+            if self.driver is not None:
+                if time.time() - self.last_used > self.max_idle:
+                    logger.info("TikTok browser has been idle too long. Restarting it...")
+                    self.close()
+                elif not self.is_healthy():
+                    logger.warning("TikTok browser failed its health check. Restarting it...")
+                    self.close()
+            
+            if self.driver is None and not self._start():
+                self.close()
+                self._unlock()
+                return None
+            
+            return self.driver
+        except Exception:
+            self.close()
+            self._unlock()
+            raise
+    
+    def release(self, healthy=True):
+        """Hand the driver back after an upload, recycling it when needed"""
+        try:
+            self.uploads += 1
+            self.last_used = time.time()
+            if not healthy:
+                logger.info("Recycling TikTok browser after a failed upload")
+                self.close()
+            elif self.uploads >= self.max_uploads:
+                logger.info(f"Recycling TikTok browser after {self.uploads} uploads")
+                self.close()
+            elif self.shared:
+                self.close()
+        finally:
+            self._unlock()
+    
+    def _unlock(self):
+        try:
+            if self._process_lock is not None:
+                self._process_lock.release()
+        finally:
+            self._lock.release()
+    
+    def is_healthy(self):
+        """Check that the browser is still alive and responding"""
+        try:
+            return self.driver.execute_script("return document.readyState") is not None
+        except Exception as e:
+            logger.warning(f"TikTok browser health check failed: {e}")
+            return False
+    
+    def close(self):
+        """Quit the browser and stop the virtual display"""
+        if self.driver is not None:
+            logger.info("Closing browser...")
+            time.sleep(5)  # Give a moment to finalize any pending post
+            try:
+                self.driver.quit()
+            except Exception as e:
+                logger.error(f"Error closing browser: {e}")
+            self.driver = None
+        
+        if self.display is not None:
+            try:
+                self.display.stop()
+            except Exception as e:
+                logger.error(f"Error stopping virtual display: {e}")
+            self.display = None
+        
+        self.uploads = 0
+    
+    def _start(self):
+        """Launch Chrome and log in to TikTok, returning True once logged in"""
+        # Import required libraries for browser automation
+        from selenium import webdriver
+        from selenium.webdriver.chrome.options import Options
+        from selenium.webdriver.chrome.service import Service
+        from webdriver_manager.chrome import ChromeDriverManager
+        
+        # For headless environments (like Google Cloud VM)
+        try:
+            from pyvirtualdisplay import Display
+            is_headless = True
+            self.display = Display(visible=0, size=(1920, 1080))
+            self.display.start()
+            logger.info("Using virtual display for headless environment")
+        except ImportError:
+            is_headless = False
+            logger.info("Running in normal display mode")
+        
+        # Set up Chrome options
+        chrome_options = Options()
+        chrome_options.add_argument("--start-maximized")
+        chrome_options.add_argument("--disable-webrtc")  # Disable WebRTC to prevent STUN server errors
+        
+        # Additional options for headless environments
+        if is_headless:
+            chrome_options.add_argument("--no-sandbox")
+            chrome_options.add_argument("--disable-dev-shm-usage")
+            chrome_options.add_argument("--headless")
+        
+        chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
+        chrome_options.add_experimental_option('useAutomationExtension', False)
+        chrome_options.add_argument('--disable-blink-features=AutomationControlled')
+        chrome_options.add_experimental_option("prefs", {
+            "credentials_enable_service": False,
+            "profile.password_manager_enabled": False,
+            "profile.default_content_setting_values.images": 1  # Allow images
+        })
+        
+        # Initialize the driver (the driver binary is only resolved once per process)
+        if self._driver_path is None:
+            self._driver_path = ChromeDriverManager().install()
+        service = Service(self._driver_path)
+        self.driver = webdriver.Chrome(service=service, options=chrome_options)
+        logger.info("Started new TikTok browser session")
+        
+        # Execute CDP command to avoid detection
+        self.driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {
+            'source': '''
+                Object.defineProperty(navigator, 'webdriver', {
+                    get: () => undefined
+                })
+            '''
+        })
+        
+        return self._log_in()
+    
+    def _log_in(self):
+        """Log in with saved cookies, falling back to waiting for a manual login"""
+        from selenium.webdriver.common.by import By
+        driver = self.driver
+        
+        # First go to TikTok main page
+        logger.info("Navigating to TikTok...")
+        driver.get("https://www.tiktok.com")
+        wait_until(driver, page_loaded, timeout=30)
+        
+        # Try to load cookies if available
+        if self.reuploader.load_tiktok_cookies(driver):
+            return True
+        
+        # Go to login page
+        driver.get("https://www.tiktok.com/login")
+        logger.info("Please log in manually. Waiting for login to complete...")
+        
+        # Wait for user to log in (look for a profile indicator)
+        def logged_in(driver):
+            try:
+                # Check if we have a user avatar visible (indicating logged in)
+                return bool(driver.find_elements(By.CSS_SELECTOR, "[data-e2e='profile-icon']")) or \
+                    "login" not in driver.current_url.lower()
+            except:
+                return False
+        
+        if wait_until(driver, logged_in, timeout=120, poll_frequency=1):  # 2 minutes max wait
+            logger.info("Detected successful login. Saving cookies.")
+            self.reuploader.save_tiktok_cookies(driver)
+            return True
+        
+        logger.warning("Login timed out. Please try again.")
+        return False
+
+
 class YouTubeChannelReuploader:
-    def __init__(self):
+    def __init__(self, shared_history=False):
         self.download_dir = "/tmp/videos"  # Use /tmp which is typically writable
         try:
             if not os.path.exists(self.download_dir):
@@ -105,9 +1730,44 @@ class YouTubeChannelReuploader:
         self.api_version = "v3"
         self.scopes = ["https://www.googleapis.com/auth/youtube.upload",
                       "https://www.googleapis.com/auth/youtube"]
-        self.history_file = "download_history.json"
+        self.history_file = "download_history.json"  # Legacy history, migrated into history_db_file
+        self.history_db_file = "download_history.db"
         self.files_to_delete = []
         self.files_to_delete_file = "files_to_delete.json"
+        self.files_to_delete_lock = threading.Lock()  # Upload branches may run in parallel
+        
+        # Identifies this run in the job table, and the job downloads it has running right now
+        self.run_id = uuid.uuid4().hex
+        self.job_downloads = set()
+        self.job_downloads_lock = threading.Lock()
+        self.shared_history = shared_history  # Worker processes share the history and deletion list
+        
+        # Shared rate limiter for metadata probes
+        self.rate_limiter = HostRateLimiter()
+        
+        # Durable per-video progress, so interrupted videos resume where they stopped
+        self.jobs = VideoJobStore()
+        
+        # Known source channels and already checked search results
+        self.channel_registry = ChannelRegistry()
+        
+        # Relevance and copyright checks for discovered and candidate videos
+        self.content_filter = ContentFilter()
+        
+        # Metadata cache shared by channel discovery, candidate checks and downloads
+        self.metadata_cache = VideoMetadataCache()
+        
+        # Downloads and watermarked copies kept for retries and the other platform's branch
+        self.media_cache = MediaCache(os.path.join(self.download_dir, "media_cache"))
+        
+        # Browser session reused across TikTok uploads
+        self.tiktok_session = TikTokBrowserSession(self, shared=shared_history)
+        
+        # Per-step latency of the TikTok upload flow
+        self.tiktok_timings = StepLatencyHistogram("TikTok upload")
+        
+        # Selectors that located TikTok page elements on previous uploads
+        self.tiktok_selectors = SelectorCache()
         
         # User agents for rotation
         self.user_agents = [
@@ -121,6 +1781,16 @@ class YouTubeChannelReuploader:
             'Mozilla/5.0 (X11; CrOS x86_64 13982.82.0) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/92.0.4515.157 Safari/537.36'
         ]
         
+        # Reused YoutubeDL instances for metadata probes, channel listings and downloads
+        self.ydl_pool = YoutubeDLPool({
+            "probe": self.probe_ydl_options,
+            "flat": self.flat_ydl_options,
+            "download": self.download_ydl_options,
+        })
+        
+        # Keep-alive HTTP client for page scraping, sharing the per-host limits with metadata probes
+        self.http = ScraperHttpClient(self.user_agents, self.rate_limiter)
+        
         # Create download directory if it doesn't exist
         if not os.path.exists(self.download_dir):
             os.makedirs(self.download_dir)
@@ -151,44 +1821,39 @@ class YouTubeChannelReuploader:
         # *DO NOT* leave this option enabled in production.
         os.environ["OAUTHLIB_INSECURE_TRANSPORT"] = "1"
         
-        # Check if we have saved credentials
-        creds = None
-        if os.path.exists(self.token_file):
-            logger.info("Loading saved YouTube credentials...")
-            with open(self.token_file, 'r') as token:
-                import google.oauth2.credentials
-                creds_data = json.load(token)
-                creds = google.oauth2.credentials.Credentials.from_authorized_user_info(creds_data)
-        
-        # If credentials don't exist or are invalid, run the flow
-        if not creds or not creds.valid:
-            if creds and creds.expired and creds.refresh_token:
-                logger.info("Refreshing expired YouTube credentials...")
-                creds.refresh(google.auth.transport.requests.Request())
-            else:
-                logger.info("Getting new YouTube credentials...")
-                flow = google_auth_oauthlib.flow.InstalledAppFlow.from_client_secrets_file(
-                    self.client_secret_file, self.scopes)
-                creds = flow.run_local_server(port=8080)
+        # Worker processes start together; the lock lets one refresh the token while the
+        # others wait and then load the refreshed one
+        with InterProcessLock(self.token_file):
+            # Check if we have saved credentials
+            creds = None
+            if os.path.exists(self.token_file):
+                logger.info("Loading saved YouTube credentials...")
+                with open(self.token_file, 'r') as token:
+                    import google.oauth2.credentials
+                    creds_data = json.load(token)
+                    creds = google.oauth2.credentials.Credentials.from_authorized_user_info(creds_data)
             
-            # Save the credentials for next run
-            with open(self.token_file, 'w') as token:
-                token.write(creds.to_json())
+            # If credentials don't exist or are invalid, run the flow
+            if not creds or not creds.valid:
+                if creds and creds.expired and creds.refresh_token:
+                    logger.info("Refreshing expired YouTube credentials...")
+                    creds.refresh(google.auth.transport.requests.Request())
+                else:
+                    logger.info("Getting new YouTube credentials...")
+                    flow = google_auth_oauthlib.flow.InstalledAppFlow.from_client_secrets_file(
+                        self.client_secret_file, self.scopes)
+                    creds = flow.run_local_server(port=8080)
+                
+                # Save the credentials for next run
+                write_json_atomic(self.token_file, json.loads(creds.to_json()))
         
         return googleapiclient.discovery.build(
             self.api_service_name, self.api_version, credentials=creds)
     
     def load_download_history(self):
         """Load history of downloaded videos to avoid duplicates"""
-        if os.path.exists(self.history_file):
-            with open(self.history_file, 'r') as f:
-                return json.load(f)
-        return {"downloaded_video_ids": []}
-    
-    def save_download_history(self):
-        """Save updated download history"""
-        with open(self.history_file, 'w') as f:
-            json.dump(self.download_history, f)
+        return DownloadHistoryStore(self.history_db_file, legacy_json_file=self.history_file,
+                                    shared=self.shared_history)
     
     def load_files_to_delete(self):
         """Load list of files to delete"""
@@ -200,25 +1865,41 @@ class YouTubeChannelReuploader:
     
     def save_files_to_delete(self):
         """Save list of files to delete"""
-        with open(self.files_to_delete_file, 'w') as f:
-            json.dump(self.files_to_delete, f)
+        write_json_atomic(self.files_to_delete_file, self.files_to_delete)
     
     def is_video_downloaded(self, video_id):
         """Check if a video has been downloaded before"""
-        return video_id in self.download_history["downloaded_video_ids"]
+        return video_id in self.download_history
+    
+    def claim_video(self, video_id):
+        """Record a video before downloading it; False if it was downloaded (or claimed by another worker) already"""
+        return self.download_history.add(video_id)
     
-    def mark_video_downloaded(self, video_id):
-        """Mark a video as downloaded in the history"""
-        if not self.is_video_downloaded(video_id):
-            self.download_history["downloaded_video_ids"].append(video_id)
-            self.save_download_history()
+    def release_video(self, video_id):
+        """Give up a claim so the video can be tried again later"""
+        self.download_history.discard(video_id)
+    
+    @contextmanager
+    def files_to_delete_guard(self):
+        """
+        Hold the files-to-delete list for a read-modify-write. Across worker processes this
+        also takes an exclusive lock file and reloads the list, so no process's entries get lost.
+        """
+        with self.files_to_delete_lock:
+            if not (self.shared_history and fcntl):
+                yield
+                return
+            with InterProcessLock(self.files_to_delete_file):
+                self.load_files_to_delete()
+                yield
     
     def schedule_file_for_deletion(self, file_path):
         """Add file to list of files to be deleted on next run"""
-        if file_path and file_path not in self.files_to_delete and os.path.exists(file_path):
-            self.files_to_delete.append(file_path)
-            logger.info(f"Scheduled file for deletion on next run: {file_path}")
-            self.save_files_to_delete()
+        with self.files_to_delete_guard():
+            if file_path and file_path not in self.files_to_delete and os.path.exists(file_path):
+                self.files_to_delete.append(file_path)
+                logger.info(f"Scheduled file for deletion on next run: {file_path}")
+                self.save_files_to_delete()
     
     def force_delete_file(self, file_path):
         """Use platform-specific method to delete a file that might be locked"""
@@ -245,21 +1926,22 @@ class YouTubeChannelReuploader:
     
     def process_pending_deletions(self):
         """Try to delete files that were scheduled for deletion"""
-        if not self.files_to_delete:
-            return
+        with self.files_to_delete_guard():
+            if not self.files_to_delete:
+                return
+                
+            logger.info(f"Attempting to delete {len(self.files_to_delete)} previously scheduled files...")
             
-        logger.info(f"Attempting to delete {len(self.files_to_delete)} previously scheduled files...")
-        
-        remaining_files = []
-        for file_path in self.files_to_delete:
-            if self.force_delete_file(file_path):
-                logger.info(f"Successfully deleted: {file_path}")
-            else:
-                logger.warning(f"Could not delete: {file_path}")
-                remaining_files.append(file_path)
-        
-        self.files_to_delete = remaining_files
-        self.save_files_to_delete()
+            remaining_files = []
+            for file_path in self.files_to_delete:
+                if self.force_delete_file(file_path):
+                    logger.info(f"Successfully deleted: {file_path}")
+                else:
+                    logger.warning(f"Could not delete: {file_path}")
+                    remaining_files.append(file_path)
+            
+            self.files_to_delete = remaining_files
+            self.save_files_to_delete()
     
     def progress_hook(self, d):
         """Progress hook for yt-dlp to monitor download progress"""
@@ -317,55 +1999,38 @@ class YouTubeChannelReuploader:
                 logger.info(f"Searching: {term}")
                 
                 # Get the search results page
-                headers = {
-                    "User-Agent": random.choice(self.user_agents),
-                    "Accept-Language": "en-US,en;q=0.9",
-                    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8"
-                }
-                
-                response = requests.get(search_url, headers=headers, timeout=15)
+                response = self.http.get(search_url)
                 response.raise_for_status()  # Raise an exception for bad status codes
                 
-                # Parse the HTML
-                soup = BeautifulSoup(response.text, 'html.parser')
-                
-                # Extract video links from the search results
-                video_links = []
-                script_tags = soup.find_all("script")
-                for script in script_tags:
-                    if script.string and "videoRenderer" in script.string:
-                        video_ids = re.findall(r'"videoId":"([^"]+)"', script.string)
-                        for video_id in video_ids:
-                            video_links.append(f"https://www.youtube.com/watch?v={video_id}")
+                # Extract video records from the search results
+                video_records = self.extract_video_records(response.text)
                 
                 # For each video, get the channel info
-                for video_url in video_links[:10]:  # Check first 10 videos in search results
+                for record in video_records[:10]:  # Check first 10 videos in search results
+                    video_url = f"https://www.youtube.com/watch?v={record.video_id}"
                     try:
+                        # Only probe search results we have not checked on an earlier refresh
+                        if self.channel_registry.is_search_result_checked(record.video_id):
+                            continue
+                        
+                        # The search page already names the channel, so skip ones we have
+                        if record.channel_id and record.channel_id in found_channels:
+                            continue
+                        if record.channel_id and self.channel_registry.has_channel_id(record.channel_id):
+                            self.channel_registry.touch_channel_id(record.channel_id)
+                            continue
+                        
                         # Add delay before checking each video
                         time.sleep(random.uniform(1, 3))
                         
-                        # Use yt-dlp to get video info including channel
-                        ydl_opts = {
-                            'quiet': True,
-                            'no_warnings': True,
-                            'skip_download': True,
-                            'forcejson': True,
-                            'nocheckcertificate': True,
-                            'ignoreerrors': True,
-                            'geo_bypass': True,
-                            'socket_timeout': 30,
-                            'http_headers': {
-                                'User-Agent': random.choice(self.user_agents),
-                                'Accept-Language': 'en-US,en;q=0.9'
-                            }
-                        }
-                        
-                        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                            info = ydl.extract_info(video_url, download=False)
+                        # Get video info including channel (cached across runs)
+                        info = self.get_video_info(video_url)
                             
                         if not info:
                             logger.warning(f"Could not get info for video {video_url}")
                             continue
+                        
+                        self.channel_registry.mark_search_result_checked(record.video_id)
                             
                         # Extract channel info
                         channel_id = info.get('channel_id')
@@ -373,25 +2038,19 @@ class YouTubeChannelReuploader:
                         channel_name = info.get('uploader')
                         
                         # Check if we actually have Taylor Swift content
-                        title = info.get('title', '').lower()
-                        description = info.get('description', '').lower()
-                        
-                        is_relevant = ('taylor swift' in title or 'taylor swift' in description) and \
-                                    ('concert' in title or 'concert' in description or 
-                                     'live' in title or 'live' in description or
-                                     'eras tour' in title or 'eras tour' in description or
-                                     'performance' in title or 'performance' in description)
+                        verdict = self.content_filter.classify(info)
                         
-                        if is_relevant and channel_id and channel_url and channel_id not in found_channels:
+                        if verdict.relevant and channel_id and channel_url and channel_id not in found_channels:
                             # Check for copyright notice
-                            has_copyright = any(term in description.lower() for term in ['©', 'copyright', 'all rights reserved'])
-                            if has_copyright:
-                                logger.info(f"Skipping channel with copyright notices: {channel_name}")
+                            if verdict.copyrighted:
+                                logger.info(f"Skipping channel with copyright notices: {channel_name} "
+                                            f"({self.content_filter.reason(verdict, 'copyright')})")
                                 continue
                                 
                             # Use the channel URL in @username format if possible
                             formatted_channel_url = f"https://www.youtube.com/{info.get('uploader_id', channel_id)}"
                             found_channels[channel_id] = formatted_channel_url
+                            self.channel_registry.add_channel(formatted_channel_url, channel_id, channel_name, relevance=1)
                             logger.info(f"Found relevant channel: {channel_name} - {formatted_channel_url}")
                             
                             if len(found_channels) >= max_channels:
@@ -401,6 +2060,8 @@ class YouTubeChannelReuploader:
                         logger.error(f"Error getting channel info for {video_url}: {e}")
                         continue
             
+            self.http.log_stats()
+            
             # Return the list of channel URLs
             return list(found_channels.values())
         
@@ -408,51 +2069,99 @@ class YouTubeChannelReuploader:
             logger.error(f"Error finding Taylor Swift channels: {e}")
             return []
     
+    def iter_channel_video_ids(self, channel_url):
+        """
+        Yield the IDs of a channel's videos, newest first
+        
+        Uses yt-dlp's flat playlist extraction without processing the result, so the
+        channel's continuation pages are only requested as the caller keeps iterating.
+        """
+        with self.ydl_pool.acquire("flat") as ydl:
+            info = ydl.extract_info(channel_url.rstrip('/') + "/videos", download=False, process=False)
+            
+            # Follow redirects (e.g. legacy channel URLs) until we reach the playlist itself
+            while info and info.get('_type') in ('url', 'url_transparent'):
+                info = ydl.extract_info(info['url'], download=False, process=False)
+            
+            if not info:
+                return
+            
+            seen = set()
+            for entry in info.get('entries') or []:
+                video_id = entry.get('id') if entry else None
+                if video_id and video_id not in seen:
+                    seen.add(video_id)
+                    yield video_id
+    
+    def get_channel_videos(self, channel_url, max_videos=CHANNEL_LISTING_LIMIT):
+        """Get up to max_videos video URLs from a channel, falling back to page scraping"""
+        logger.info(f"Fetching videos from source channel: {channel_url}")
+        
+        video_links = VideoLinkAccumulator()
+        try:
+            for video_id in self.iter_channel_video_ids(channel_url):
+                video_links.add_id(video_id)
+                if len(video_links) >= max_videos:
+                    break
+        except Exception as e:
+            logger.warning(f"Flat channel listing failed: {e}")
+        
+        if video_links:
+            logger.info(f"Found {len(video_links)} videos on the channel")
+            return video_links.urls()
+        
+        logger.info("Falling back to scraping the channel page")
+        return self.scrape_channel_videos(channel_url)
+    
+    def extract_video_records(self, html):
+        """
+        Extract de-duplicated video records, in page order, from a YouTube search or channel page.
+        Decodes only the ytInitialData JSON when the page embeds it; otherwise falls back
+        to parsing the full document with BeautifulSoup.
+        """
+        video_links = VideoLinkAccumulator()
+        
+        records = extract_page_records(html)
+        if records and records[0]:
+            for record in records[0]:
+                video_links.add(record)
+            return video_links.records()
+        
+        soup = BeautifulSoup(html, 'html.parser')
+        
+        # Look for video IDs in the page scripts
+        for script in soup.find_all("script"):
+            if script.string and "videoRenderer" in script.string:
+                for video_id in re.findall(r'"videoId":"([^"]+)"', script.string):
+                    video_links.add_id(video_id)
+        
+        # Alternate method - look for video links in anchor tags
+        if not video_links:
+            for a_tag in soup.find_all("a", href=True):
+                if "/watch?v=" in a_tag["href"]:
+                    video_id = parse_qs(urlparse(a_tag["href"]).query).get("v", [None])[0]
+                    if video_id:
+                        video_links.add_id(video_id)
+        
+        return video_links.records()
+    
     @retry(max_tries=3, delay_seconds=2, exceptions=(requests.exceptions.RequestException,))
-    def get_channel_videos(self, channel_url):
+    def scrape_channel_videos(self, channel_url):
         """Get videos from a channel using web scraping instead of pytube Channel class"""
         try:
-            logger.info(f"Fetching videos from source channel: {channel_url}")
-            
             # Add a random delay to avoid rate limiting
             time.sleep(random.uniform(1, 3))
             
             # Get the channel page
-            headers = {
-                "User-Agent": random.choice(self.user_agents),
-                "Accept-Language": "en-US,en;q=0.9",
-                "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8"
-            }
-            
-            response = requests.get(channel_url + "/videos", headers=headers, timeout=15)
+            response = self.http.get(channel_url + "/videos")
             
             if response.status_code != 200:
                 logger.error(f"Failed to fetch channel page: {response.status_code}")
                 return []
             
-            # Parse the HTML
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Extract video links - both patterns work for different page structures
-            video_links = []
-            
-            # Look for video links in the page
-            script_tags = soup.find_all("script")
-            for script in script_tags:
-                if script.string and "videoRenderer" in script.string:
-                    video_ids = re.findall(r'"videoId":"([^"]+)"', script.string)
-                    for video_id in video_ids:
-                        if video_id not in [link.split('=')[-1].split('&')[0] for link in video_links]:
-                            video_links.append(f"https://www.youtube.com/watch?v={video_id}")
-            
-            # Alternate method - look for video links in anchor tags
-            if not video_links:
-                for a_tag in soup.find_all("a", href=True):
-                    if "/watch?v=" in a_tag["href"]:
-                        video_id = a_tag["href"].split("=")[-1].split("&")[0]
-                        full_url = f"https://www.youtube.com/watch?v={video_id}"
-                        if full_url not in video_links:
-                            video_links.append(full_url)
+            # Extract video links from the page's ytInitialData (or the HTML fallback)
+            video_links = [f"https://www.youtube.com/watch?v={record.video_id}"
+                           for record in self.extract_video_records(response.text)]
             
             logger.info(f"Found {len(video_links)} videos on the channel")
             return video_links
@@ -461,8 +2170,188 @@ class YouTubeChannelReuploader:
             logger.error(f"Error fetching channel videos: {e}")
             raise  # Re-raise for retry decorator
     
-    def get_random_channel_video(self, channel_url, max_videos_to_check=50):
-        """Get a random video from a source channel that hasn't been downloaded before and doesn't have copyright notices"""
+    def probe_ydl_options(self):
+        """yt-dlp options for metadata probes"""
+        return {
+            'quiet': True,
+            'no_warnings': True,
+            'skip_download': True,
+            'forcejson': True,
+            'nocheckcertificate': True,
+            'ignoreerrors': True,
+            'geo_bypass': True,
+            'socket_timeout': 30,
+            'http_headers': {
+                'User-Agent': random.choice(self.user_agents),
+                'Accept-Language': 'en-US,en;q=0.9'
+            }
+        }
+    
+    def flat_ydl_options(self):
+        """yt-dlp options for lazy channel listings"""
+        return {
+            'quiet': True,
+            'no_warnings': True,
+            'extract_flat': 'in_playlist',
+            'nocheckcertificate': True,
+            'ignoreerrors': True,
+            'socket_timeout': 30,
+            'http_headers': {
+                'User-Agent': random.choice(self.user_agents),
+                'Accept-Language': 'en-US,en;q=0.9'
+            }
+        }
+    
+    def download_ydl_options(self):
+        """yt-dlp options for downloads (the output template and format are set per download)"""
+        ydl_opts = {
+            'format': DOWNLOAD_FORMAT,
+            'merge_output_format': 'mp4',  # Separate DASH video and audio streams are merged into an MP4
+            'outtmpl': os.path.join(self.download_dir, '%(title)s.%(ext)s'),
+            'quiet': False,  # Changed to False to see more output
+            'no_warnings': False,  # Changed to False to see warnings
+            'verbose': True,  # Added for more verbose output
+            'nocheckcertificate': True,
+            'ignoreerrors': True,
+            'geo_bypass': True,
+            'geo_bypass_country': 'US',
+            'socket_timeout': 30,
+            'retries': 10,
+            'fragment_retries': 10,
+            'external_downloader_args': ['--max-retries', '10'],
+            'progress_hooks': [self.progress_hook],  # Added progress hook
+            'http_headers': {
+                'User-Agent': random.choice(self.user_agents),
+                'Accept-Language': 'en-US,en;q=0.9'
+            }
+        }
+        ffmpeg_exe = get_ffmpeg_exe()
+        if os.path.isabs(ffmpeg_exe):
+            ydl_opts['ffmpeg_location'] = ffmpeg_exe
+        return ydl_opts
+    
+    def probe_video_info(self, video_url):
+        """Fetch metadata for a video without downloading it, respecting the per-host rate limit"""
+        # Borrow the instance before taking a rate limit slot, in the same order as probe_videos
+        with self.ydl_pool.acquire("probe") as ydl:
+            with self.rate_limiter.limit(video_url):
+                return ydl.extract_info(video_url, download=False)
+    
+    def get_video_info(self, video_url):
+        """Get video metadata from the cache, probing the network only on a miss"""
+        video_id = extract_video_id(video_url)
+        info = self.metadata_cache.get(video_id)
+        if info is not None:
+            logger.debug(f"Metadata cache hit for {video_id}")
+            return info
+        
+        info = self.probe_video_info(video_url)
+        if not info:
+            return None
+        return self.metadata_cache.put(video_id, info)
+    
+    def probe_videos(self, video_ids, stop=None):
+        """
+        Fetch metadata for several videos in one pass
+        
+        Cached entries are served from the metadata cache; the rest are extracted one after
+        another by a single pooled YoutubeDL, so the extractor session (connections, player JS)
+        is set up once for the whole batch. Each extraction still takes its own per-host rate
+        limit slot, so a batch is spaced like the same number of single probes.
+        
+        Args:
+            video_ids: IDs of the videos to probe
+            stop: Optional threading.Event; once set, the remaining extractions are skipped
+            
+        Returns:
+            {video_id: info (title, description, duration, channel, ...) or None if it could not be fetched},
+            without the IDs skipped because stop was set
+        """
+        results = {}
+        missing = []
+        for video_id in dict.fromkeys(video_ids):
+            info = self.metadata_cache.get(video_id)
+            if info is not None:
+                results[video_id] = info
+            else:
+                missing.append(video_id)
+        
+        if missing:
+            logger.info(f"Probing {len(missing)} videos in one batch ({len(results)} cached)")
+            with self.ydl_pool.acquire("probe") as ydl:
+                for index, video_id in enumerate(missing):
+                    if stop is not None and stop.is_set():
+                        logger.info(f"Probe batch stopped early, skipping {len(missing) - index} videos")
+                        missing = missing[:index]
+                        break
+                    video_url = f"https://www.youtube.com/watch?v={video_id}"
+                    with self.rate_limiter.limit(video_url):
+                        info = ydl.extract_info(video_url, download=False)
+                    if info:
+                        results[video_id] = self.metadata_cache.put(video_id, info)
+        
+        for video_id in missing:
+            if video_id not in results:
+                logger.warning(f"Could not get info for video {video_id}")
+                results[video_id] = None
+        return results
+    
+    def check_candidate_batch(self, video_urls, stop=None):
+        """
+        Check several candidates with one batched probe, returning [(video_url, verdict)]
+        
+        Candidates skipped because stop was set are left out of the result.
+        """
+        video_ids = [extract_video_id(video_url) for video_url in video_urls]
+        try:
+            infos = self.probe_videos(video_ids, stop=stop)
+        except Exception as e:
+            logger.error(f"Error probing candidate batch: {e}")
+            return [(video_url, None) for video_url in video_urls]
+        
+        found = [infos[video_id] for video_id in video_ids if infos.get(video_id)]
+        verdicts = {verdict.video_id: verdict for verdict in self.content_filter.classify_batch(found)}
+        return [(video_url, self.candidate_verdict(video_id, infos.get(video_id), verdicts.get(video_id)))
+                for video_url, video_id in zip(video_urls, video_ids) if video_id in infos]
+    
+    def candidate_verdict(self, video_id, info, content_verdict=None):
+        """
+        True if a probed video is acceptable, False if it has a copyright notice or does not fit
+        the enabled platforms' media limits, None without metadata
+        """
+        if not info:
+            logger.warning(f"Could not get info for video {video_id}")
+            return None
+        
+        # Check for copyright symbols or text in description
+        content_verdict = content_verdict or self.content_filter.classify(info)
+        
+        if content_verdict.copyrighted:
+            logger.info(f"Video {video_id} rejected due to copyright notice in description "
+                        f"({self.content_filter.reason(content_verdict, 'copyright')})")
+            return False
+        
+        # Reject videos the target platforms would refuse before any bytes are downloaded
+        violations = media_limit_violations(info, self.enabled_platforms())
+        if violations:
+            logger.info(f"Video {video_id} rejected by media limits: {'; '.join(violations)}")
+            return False
+        
+        logger.info(f"Video {video_id} has no copyright notice in description")
+        return True
+    
+    def get_random_channel_video(self, channel_url, max_videos_to_check=50, concurrent=CONCURRENT_PROBING,
+                                 min_candidates=PROBE_TARGET_CANDIDATES, exclude_ids=()):
+        """
+        Get a random video from a source channel that hasn't been downloaded before and doesn't have copyright notices
+        
+        Args:
+            channel_url: Source channel URL
+            max_videos_to_check: Maximum number of videos to look at
+            concurrent: Probe candidates in parallel with a bounded worker pool
+            min_candidates: In concurrent mode, stop probing once this many acceptable videos are found
+            exclude_ids: Video IDs not to pick (e.g. ones already in flight but not yet claimed)
+        """
         try:
             # Get all videos from the channel
             try:
@@ -475,70 +2364,23 @@ class YouTubeChannelReuploader:
                 logger.warning("No videos found on this channel")
                 return None
             
+            self.channel_registry.set_video_count(channel_url, len(video_links))
+            
             # Shuffle the videos to check them in random order
             random.shuffle(video_links)
             
-            # Filter out videos we've already downloaded or have copyright notices
-            available_videos = []
-            copyright_rejected = 0
-            count = 0
+            # Only probe videos we haven't downloaded yet
+            candidates = [video_url for video_url in video_links[:max_videos_to_check]
+                          if extract_video_id(video_url) not in exclude_ids
+                          and not self.is_video_downloaded(extract_video_id(video_url))]
             
-            for video_url in video_links:
-                if count >= max_videos_to_check:
-                    break
-                
-                # Extract video ID
-                video_id = video_url.split("=")[-1].split("&")[0]
-                
-                if not self.is_video_downloaded(video_id):
-                    # Get video info to check description
-                    try:
-                        # Add a random delay before checking
-                        time.sleep(random.uniform(2, 5))
-                        
-                        ydl_opts = {
-                            'quiet': True,
-                            'no_warnings': True,
-                            'skip_download': True,
-                            'forcejson': True,
-                            'nocheckcertificate': True,
-                            'ignoreerrors': True,
-                            'geo_bypass': True,
-                            'socket_timeout': 30,
-                            'http_headers': {
-                                'User-Agent': random.choice(self.user_agents),
-                                'Accept-Language': 'en-US,en;q=0.9'
-                            }
-                        }
-                        
-                        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                            info = ydl.extract_info(video_url, download=False)
-                        
-                        if not info:
-                            logger.warning(f"Could not get info for video {video_id}")
-                            continue
-                            
-                        # Check for copyright symbols or text in description
-                        description = info.get('description', '').lower()
-                        copyright_indicators = ['©', 'copyright', 'all rights reserved', 'licensed to', 'provided to youtube']
-                        
-                        has_copyright_notice = any(indicator in description.lower() for indicator in copyright_indicators)
-                        
-                        if not has_copyright_notice:
-                            available_videos.append(video_url)
-                            logger.info(f"Video {video_id} has no copyright notice in description")
-                        else:
-                            copyright_rejected += 1
-                            logger.info(f"Video {video_id} rejected due to copyright notice in description")
-                    except Exception as e:
-                        logger.error(f"Error checking video {video_id}: {e}")
-                        # Skip this video if we can't check it
-                        continue
-                
-                count += 1
+            if concurrent:
+                available_videos, rejected = self._probe_candidates_concurrently(candidates, min_candidates)
+            else:
+                available_videos, rejected = self._probe_candidates_sequentially(candidates)
             
             if not available_videos:
-                logger.warning(f"No new videos available to download from this channel (Copyright rejected: {copyright_rejected})")
+                logger.warning(f"No new videos available to download from this channel (Rejected for copyright or media limits: {rejected})")
                 return None
             
             # Choose a random video from the filtered list
@@ -548,6 +2390,57 @@ class YouTubeChannelReuploader:
         except Exception as e:
             logger.error(f"Error getting random channel video: {e}")
             return None
+    
+    def _probe_candidates_sequentially(self, candidates):
+        """Probe candidates one batch at a time with a random delay between batches"""
+        available_videos = []
+        rejected = 0
+        
+        for start in range(0, len(candidates), PROBE_BATCH_SIZE):
+            # Add a random delay before checking each batch
+            time.sleep(random.uniform(2, 5))
+            
+            for video_url, verdict in self.check_candidate_batch(candidates[start:start + PROBE_BATCH_SIZE]):
+                if verdict:
+                    available_videos.append(video_url)
+                elif verdict is False:
+                    rejected += 1
+        
+        return available_videos, rejected
+    
+    def _probe_candidates_concurrently(self, candidates, min_candidates):
+        """Probe candidates in a bounded worker pool, stopping once enough acceptable videos are found"""
+        available_videos = []
+        rejected = 0
+        
+        # Size batches so one round of workers probes about min_candidates videos, and share a
+        # stop event so batches still running skip their remaining extractions once enough are found
+        wanted = min(min_candidates or len(candidates), len(candidates))
+        batch_size = max(1, min(PROBE_BATCH_SIZE, -(-wanted // PROBE_WORKERS)))
+        batches = [candidates[start:start + batch_size] for start in range(0, len(candidates), batch_size)]
+        stop = threading.Event()
+        
+        logger.info(f"Probing {len(candidates)} candidate videos in {len(batches)} batches with {PROBE_WORKERS} workers")
+        executor = ThreadPoolExecutor(max_workers=PROBE_WORKERS)
+        try:
+            futures = [executor.submit(self.check_candidate_batch, batch, stop) for batch in batches]
+            
+            for future in as_completed(futures):
+                for video_url, verdict in future.result():
+                    if verdict:
+                        available_videos.append(video_url)
+                    elif verdict is False:
+                        rejected += 1
+                
+                if min_candidates and len(available_videos) >= min_candidates:
+                    logger.info(f"Found {len(available_videos)} acceptable videos, stopping early")
+                    stop.set()
+                    break
+        finally:
+            # Drop queued probes; in-flight ones finish in the background
+            executor.shutdown(wait=False, cancel_futures=True)
+        
+        return available_videos, rejected
         
     def create_text_image(self, text, video_size, fontScale=1, color=(255, 255, 255), thickness=2, position="bottom-right"):
         """Create an image with transparent background and text for watermarking"""
@@ -589,14 +2482,21 @@ class YouTubeChannelReuploader:
         return img
     
     @retry(max_tries=3, delay_seconds=2, exceptions=(subprocess.SubprocessError,))
-    def add_watermark(self, video_path, output_path=None, watermark_text="© My Channel", position="bottom-middle"):
-        """Add watermark to video using FFmpeg"""
+    def add_watermark(self, video_path, output_path=None, watermark_text="© My Channel", position="bottom-middle",
+                      encoding_profile=DEFAULT_ENCODING_PROFILE):
+        """Add watermark to video using FFmpeg, encoding with one of ENCODING_PROFILES"""
+        temp_path = None
         try:
             if output_path is None:
                 # Create output path by adding '_watermarked' before the extension
                 name, ext = os.path.splitext(video_path)
                 output_path = f"{name}_watermarked{ext}"
             
+            # Reuse an earlier encode of the same source with the same watermark and encoder settings
+            cache_key = self.watermark_cache_key(file_fingerprint(video_path), watermark_text, encoding_profile)
+            if self.media_cache.restore(cache_key, output_path):
+                return output_path
+            
             logger.info(f"Adding watermark to video: {video_path}")
             
             # Set a default position parameter
@@ -619,24 +2519,16 @@ class YouTubeChannelReuploader:
             # Print the position being used
             logger.info(f"Using position parameter: {position_param}")
             
-            # Try to get ffmpeg from imageio_ffmpeg
-            try:
-                import imageio_ffmpeg
-                ffmpeg_exe = imageio_ffmpeg.get_ffmpeg_exe()
-            except ImportError:
-                # If imageio_ffmpeg is not installed, try to use system ffmpeg
-                ffmpeg_exe = "ffmpeg"
-                
-            # Construct FFmpeg command
-            # Modify the ffmpeg_cmd in the add_watermark function:
             # Simpler watermarking approach:
+            temp_path = temp_output_path(output_path)
             ffmpeg_cmd = [
-                ffmpeg_exe,
+                get_ffmpeg_exe(),
                 "-i", video_path,
-                "-vf", f"drawbox=x=0:y=main_h-40:w=main_w:h=40:color=black@0.5:t=fill,drawtext=text='{watermark_text}':x=(w-text_w)/2:y=main_h-20:fontcolor=white:fontsize=24",
+                "-vf", watermark_filter(watermark_text),
+                *encoding_args(encoding_profile),
                 "-codec:a", "copy",
                 "-y",
-                output_path
+                temp_path
             ]
             
             # Run the FFmpeg command
@@ -648,8 +2540,10 @@ class YouTubeChannelReuploader:
                 raise subprocess.SubprocessError(f"FFmpeg failed with code {result.returncode}: {result.stderr}")
             
             # Verify the output file exists and has content
-            if os.path.exists(output_path) and os.path.getsize(output_path) > 0:
+            if os.path.exists(temp_path) and os.path.getsize(temp_path) > 0:
+                os.replace(temp_path, output_path)
                 logger.info(f"Watermark added successfully. Output: {output_path}")
+                self.media_cache.store(output_path, cache_key)
                 return output_path
             else:
                 logger.error(f"Failed to create watermarked video file.")
@@ -658,58 +2552,149 @@ class YouTubeChannelReuploader:
         except Exception as e:
             logger.error(f"Error adding watermark: {e}")
             traceback.print_exc()
+            if temp_path and os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+    
+    @retry(max_tries=3, delay_seconds=2, exceptions=(subprocess.SubprocessError,))
+    def add_watermarks(self, video_path, variants, encoding_profile=DEFAULT_ENCODING_PROFILE):
+        """
+        Produce several watermarked copies of a video from a single FFmpeg decode
+        
+        Args:
+            video_path: Source video
+            variants: List of (watermark_text, output_path) tuples
+            encoding_profile: Name of the ENCODING_PROFILES entry used for every output
+        
+        Returns:
+            List of output paths, in the same order as variants
+        """
+        if len(variants) == 1:
+            watermark_text, output_path = variants[0]
+            return [self.add_watermark(video_path, output_path=output_path, watermark_text=watermark_text,
+                                       encoding_profile=encoding_profile)]
+        
+        output_paths = [output_path for _, output_path in variants]
+        
+        # Reuse cached encodes and only run FFmpeg for the variants that are missing
+        source_fingerprint = file_fingerprint(video_path)
+        pending = []
+        for watermark_text, output_path in variants:
+            cache_key = self.watermark_cache_key(source_fingerprint, watermark_text, encoding_profile)
+            if not self.media_cache.restore(cache_key, output_path):
+                pending.append(((watermark_text, output_path), cache_key))
+        if not pending:
+            return output_paths
+        
+        # FFmpeg writes temp files that replace the outputs only once they are complete
+        temp_variants = [(watermark_text, temp_output_path(output_path)) for (watermark_text, output_path), _ in pending]
+        try:
+            logger.info(f"Adding {len(pending)} watermarks to video in one pass: {video_path}")
+            
+            ffmpeg_cmd = self.build_multi_watermark_command(video_path, temp_variants, encoding_profile)
+            
+            logger.info(f"Running FFmpeg command: {' '.join(ffmpeg_cmd)}")
+            result = subprocess.run(ffmpeg_cmd, capture_output=True, text=True)
+            
+            if result.returncode != 0:
+                logger.error(f"FFmpeg error: {result.stderr}")
+                raise subprocess.SubprocessError(f"FFmpeg failed with code {result.returncode}: {result.stderr}")
+            
+            for ((_, output_path), cache_key), (_, temp_path) in zip(pending, temp_variants):
+                if not os.path.exists(temp_path) or os.path.getsize(temp_path) == 0:
+                    logger.error(f"Failed to create watermarked video file: {output_path}")
+                    raise FileNotFoundError("Watermarked file was not created properly")
+                os.replace(temp_path, output_path)
+                self.media_cache.store(output_path, cache_key)
+            
+            logger.info(f"Watermarks added successfully. Outputs: {output_paths}")
+            return output_paths
+            
+        except Exception as e:
+            logger.error(f"Error adding watermarks: {e}")
+            traceback.print_exc()
             raise
+        finally:
+            for _, temp_path in temp_variants:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+    
+    def watermark_cache_key(self, source_fingerprint, watermark_text, encoding_profile):
+        """Media cache key of a watermarked copy: source content, filter and encoder settings"""
+        return MediaCache.key("watermark", source=source_fingerprint, text=watermark_text,
+                              filter=watermark_filter(watermark_text), encoding=encoding_args(encoding_profile))
+    
+    def build_multi_watermark_command(self, input_spec, variants, encoding_profile=DEFAULT_ENCODING_PROFILE):
+        """
+        Build an FFmpeg command that decodes input_spec once and writes one watermarked output per variant
+        
+        Args:
+            input_spec: Input file path, or "pipe:0" to read from stdin
+            variants: List of (watermark_text, output_path) tuples
+            encoding_profile: Name of the ENCODING_PROFILES entry used for every output
+        """
+        # Decode once, split the video stream and draw a different watermark on each branch
+        split_labels = "".join(f"[v{i}]" for i in range(len(variants)))
+        filtergraph = [f"[0:v]split={len(variants)}{split_labels}"]
+        for i, (watermark_text, _) in enumerate(variants):
+            filtergraph.append(f"[v{i}]{watermark_filter(watermark_text)}[out{i}]")
+        
+        ffmpeg_cmd = [
+            get_ffmpeg_exe(),
+            "-i", input_spec,
+            "-filter_complex", ";".join(filtergraph),
+            "-y"
+        ]
+        for i, (_, output_path) in enumerate(variants):
+            ffmpeg_cmd += ["-map", f"[out{i}]", "-map", "0:a?", *encoding_args(encoding_profile),
+                           "-codec:a", "copy", output_path]
+        return ffmpeg_cmd
+    
+    def watermark_variants(self, video_path, platforms):
+        """List the (watermark_text, output_path) variant for each platform"""
+        name, ext = os.path.splitext(video_path)
+        return [(WATERMARK_TEXTS[platform], f"{name}_watermarked_{platform}{ext}") for platform in platforms]
+    
+    def watermark_for_platforms(self, video_path, platforms, encoding_profile=DEFAULT_ENCODING_PROFILE):
+        """Create one watermarked copy of the video per platform, returning {platform: path}"""
+        variants = self.watermark_variants(video_path, platforms)
+        output_paths = self.add_watermarks(video_path, variants, encoding_profile=encoding_profile)
+        return dict(zip(platforms, output_paths))
     
     @retry(max_tries=MAX_DOWNLOAD_RETRIES, delay_seconds=3, backoff_factor=2, 
            exceptions=(yt_dlp.utils.DownloadError, subprocess.SubprocessError))
-    def download_video(self, video_url):
-        """Download a video using yt-dlp (more robust than pytube)"""
+    def download_video(self, video_url, platforms=None):
+        """
+        Download a video using yt-dlp (more robust than pytube)
+        
+        Only the smallest format that meets the targets of platforms (default: the enabled
+        ones) is downloaded; see select_download_format.
+        """
+        claimed = False
         try:
             # Extract video ID
-            video_id = video_url.split("=")[-1].split("&")[0]
+            video_id = extract_video_id(video_url)
             
-            # Check if already downloaded
-            if self.is_video_downloaded(video_id):
+            # Claim the video up front so parallel workers never download it twice
+            if not self.claim_video(video_id):
                 logger.info(f"Video {video_id} already downloaded previously. Skipping.")
                 return None
+            claimed = True
             
             # Add a random delay before downloading
             delay = random.uniform(3, 8)
             logger.info(f"Adding delay of {delay:.2f} seconds before download...")
             time.sleep(delay)
             
-            # Get info about the video first
-            ydl_opts = {
-                'quiet': True,
-                'no_warnings': True,
-                'skip_download': True,
-                'forcejson': True,
-                'nocheckcertificate': True,
-                'ignoreerrors': True,
-                'geo_bypass': True,
-                'socket_timeout': 30,
-                'http_headers': {
-                    'User-Agent': random.choice(self.user_agents),
-                    'Accept-Language': 'en-US,en;q=0.9'
-                }
-            }
-            
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                info = ydl.extract_info(video_url, download=False)
+            # Get info about the video first (usually already cached by the candidate check)
+            info = self.get_video_info(video_url)
                 
             if not info:
                 logger.error(f"Could not get info for video {video_id}")
                 raise yt_dlp.utils.DownloadError(f"Failed to get video info for {video_id}")
                 
             title = info.get('title', f'video_{video_id}')
-            description = info.get('description', '')
-            
-            # Clean the title to make it a valid filename
-            clean_title = "".join([c for c in title if c.isalpha() or c.isdigit() or c == ' ']).rstrip()
-            if not clean_title:
-                clean_title = video_id
-            filename = f"{clean_title}.mp4"
-            filepath = os.path.join(self.download_dir, filename)
+            filepath = self.video_filepath(info, video_id)
             
             # Log the exact path where we'll save the file
             logger.info(f"Will download to: {filepath}")
@@ -724,57 +2709,272 @@ class YouTubeChannelReuploader:
                     logger.error(f"Failed to recreate download directory: {e}")
                     raise FileNotFoundError(f"Could not create download directory: {self.download_dir}")
  
-            # Configure yt-dlp options for the actual download
-            ydl_opts = {
-                'format': 'best[ext=mp4]/best',
-                'outtmpl': filepath,
-                'quiet': False,  # Changed to False to see more output
-                'no_warnings': False,  # Changed to False to see warnings
-                'verbose': True,  # Added for more verbose output
-                'nocheckcertificate': True,
-                'ignoreerrors': True,
-                'geo_bypass': True,
-                'geo_bypass_country': 'US',
-                'socket_timeout': 30,
-                'retries': 10,
-                'fragment_retries': 10,
-                'external_downloader_args': ['--max-retries', '10'],
-                'progress_hooks': [self.progress_hook],  # Added progress hook
-                'http_headers': {
-                    'User-Agent': random.choice(self.user_agents),
-                    'Accept-Language': 'en-US,en;q=0.9'
-                }
-            }
+            # Reuse an earlier download of the same video and format
+            selection = self.download_format(info, platforms or self.enabled_platforms())
+            cache_key = MediaCache.key("download", video_id=video_id, format=selection.format_spec)
+            if self.media_cache.restore(cache_key, filepath):
+                logger.info(f"Reusing cached download: {filepath}")
+                return self.build_video_data(info, video_id, filepath)
+            
+            # A same-named file may be another video's download (or a link to its cache entry);
+            # yt-dlp would skip the download if it found one there
+            if os.path.exists(filepath):
+                os.remove(filepath)
             
             logger.info(f"Downloading: {title}")
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            with self.ydl_pool.acquire("download") as ydl:
+                ydl.params['outtmpl']['default'] = filepath
+                ydl.params['format'] = selection.format_spec
+                ydl.format_selector = ydl.build_format_selector(selection.format_spec)
                 ydl.download([video_url])
             
             logger.info(f"Downloaded: {filepath}")
+            if os.path.exists(filepath):
+                self.media_cache.store(filepath, cache_key)
+            
+            return self.build_video_data(info, video_id, filepath)
+            
+        except Exception as e:
+            logger.error(f"Error downloading with yt-dlp {video_url}: {e}")
+            if claimed:
+                self.release_video(video_id)
+            raise
+    
+    def download_format(self, info, platforms, progressive_only=False):
+        """Choose the format to download for platforms and log what it saves"""
+        selection = select_download_format(info, platforms, progressive_only=progressive_only)
+        if selection.format_ids:
+            size = f"~{selection.estimated_size / 1024 ** 2:.1f}MB" if selection.estimated_size else "unknown size"
+            logger.info(f"Selected format {'+'.join(selection.format_ids)} for {', '.join(platforms)} "
+                        f"({selection.short_side}p, {size})")
+        return selection
+    
+    def video_filepath(self, info, video_id):
+        """Local path for a downloaded video, named after its title"""
+        title = info.get('title', f'video_{video_id}')
+        
+        # Clean the title to make it a valid filename
+        clean_title = "".join([c for c in title if c.isalpha() or c.isdigit() or c == ' ']).rstrip()
+        if not clean_title:
+            clean_title = video_id
+        filename = f"{clean_title}.mp4"
+        return os.path.join(self.download_dir, filename)
+    
+    def build_video_data(self, info, video_id, filepath):
+        """Collect the metadata needed by the upload steps"""
+        title = info.get('title', f'video_{video_id}')
+        description = info.get('description', '')
+        
+        # Extract hashtags from description
+        hashtags = []
+        if description:
+            # Look for hashtags in the description
+            hashtags = re.findall(r'#\w+', description)
+            # Make list unique
+            hashtags = list(set(hashtags))
+        
+        return {
+            "original_filepath": filepath,
+            "title": title,
+            "description": description,
+            "hashtags": hashtags,
+            "tags": ["shorts", "trending"],
+            "video_id": video_id
+        }
+    
+    @retry(max_tries=2, delay_seconds=3, backoff_factor=2, 
+           exceptions=(yt_dlp.utils.DownloadError, subprocess.SubprocessError))
+    def download_and_watermark(self, video_url, platforms, encoding_profile=DEFAULT_ENCODING_PROFILE):
+        """
+        Stream a video from yt-dlp straight into FFmpeg and write only the watermarked copies
+        
+        The original file never touches the disk and encoding overlaps with the download.
+        FFmpeg can only read an MP4 from a pipe when its index is at the front of the file
+        (YouTube's progressive streams are laid out that way); process_source_channel falls
+        back to a regular download if streaming fails.
+        
+        Returns:
+            video_data like download_video, with original_filepath set to None and
+            watermarked_paths mapping each platform to its output file
+        """
+        claimed = False
+        temp_variants = []
+        try:
+            video_id = extract_video_id(video_url)
+            
+            if not self.claim_video(video_id):
+                logger.info(f"Video {video_id} already downloaded previously. Skipping.")
+                return None
+            claimed = True
+            
+            # Add a random delay before downloading
+            delay = random.uniform(3, 8)
+            logger.info(f"Adding delay of {delay:.2f} seconds before download...")
+            time.sleep(delay)
+            
+            info = self.get_video_info(video_url)
+            if not info:
+                logger.error(f"Could not get info for video {video_id}")
+                raise yt_dlp.utils.DownloadError(f"Failed to get video info for {video_id}")
+            
+            os.makedirs(self.download_dir, exist_ok=True)
+            variants = self.watermark_variants(self.video_filepath(info, video_id), platforms)
+            selection = self.download_format(info, platforms, progressive_only=True)
+            
+            # yt-dlp writes the progressive MP4 to stdout, FFmpeg reads it from stdin
+            downloader_cmd = [
+                sys.executable, "-m", "yt_dlp",
+                "--format", selection.format_spec,
+                "--output", "-",
+                "--quiet", "--no-warnings",
+                "--no-check-certificate",
+                "--geo-bypass", "--geo-bypass-country", "US",
+                "--socket-timeout", "30",
+                "--retries", "10",
+                "--user-agent", random.choice(self.user_agents),
+                video_url
+            ]
+            temp_variants = [(watermark_text, temp_output_path(output_path)) for watermark_text, output_path in variants]
+            ffmpeg_cmd = self.build_multi_watermark_command("pipe:0", temp_variants, encoding_profile)
+            
+            logger.info(f"Streaming {info.get('title', video_id)} into FFmpeg")
+            logger.info(f"Running FFmpeg command: {' '.join(ffmpeg_cmd)}")
+            with tempfile.TemporaryFile() as downloader_log:
+                downloader = subprocess.Popen(downloader_cmd, stdout=subprocess.PIPE, stderr=downloader_log)
+                ffmpeg = subprocess.Popen(ffmpeg_cmd, stdin=downloader.stdout,
+                                          stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+                # Let yt-dlp receive SIGPIPE if FFmpeg exits early
+                downloader.stdout.close()
+                
+                _, ffmpeg_stderr = ffmpeg.communicate()
+                downloader.wait()
+                downloader_log.seek(0)
+                downloader_stderr = downloader_log.read().decode(errors='replace')
+            
+            if downloader.returncode != 0:
+                logger.error(f"yt-dlp error: {downloader_stderr}")
+                raise yt_dlp.utils.DownloadError(f"yt-dlp failed with code {downloader.returncode}: {downloader_stderr}")
+            
+            if ffmpeg.returncode != 0:
+                ffmpeg_stderr = ffmpeg_stderr.decode(errors='replace')
+                logger.error(f"FFmpeg error: {ffmpeg_stderr}")
+                raise subprocess.SubprocessError(f"FFmpeg failed with code {ffmpeg.returncode}: {ffmpeg_stderr}")
             
-            # Mark video as downloaded
-            self.mark_video_downloaded(video_id)
+            watermarked_paths = {}
+            for platform, (_, output_path), (_, temp_path) in zip(platforms, variants, temp_variants):
+                if not os.path.exists(temp_path) or os.path.getsize(temp_path) == 0:
+                    logger.error(f"Failed to create watermarked video file: {output_path}")
+                    raise subprocess.SubprocessError(f"Watermarked file was not created properly: {output_path}")
+                os.replace(temp_path, output_path)
+                watermarked_paths[platform] = output_path
+            
+            logger.info(f"Streamed and watermarked: {list(watermarked_paths.values())}")
+            
+            video_data = self.build_video_data(info, video_id, None)
+            video_data["watermarked_paths"] = watermarked_paths
+            return video_data
+            
+        except Exception as e:
+            logger.error(f"Error streaming {video_url} into FFmpeg: {e}")
+            if claimed:
+                self.release_video(video_id)
+            raise
+        finally:
+            for _, temp_path in temp_variants:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+    
+    def upload_session_key(self, filepath):
+        """Identify a file for upload session resumption (path, size and modification time)"""
+        stat = os.stat(filepath)
+        return f"{os.path.abspath(filepath)}:{stat.st_size}:{int(stat.st_mtime)}"
+    
+    def load_upload_sessions(self):
+        """Load saved resumable upload sessions, dropping expired ones"""
+        if not os.path.exists(YOUTUBE_UPLOAD_SESSIONS_FILE):
+            return {}
+        try:
+            with open(YOUTUBE_UPLOAD_SESSIONS_FILE, 'r') as f:
+                sessions = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.error(f"Could not read upload sessions: {e}")
+            return {}
+        cutoff = time.time() - YOUTUBE_UPLOAD_SESSION_TTL
+        return {key: session for key, session in sessions.items() if session.get("saved_at", 0) > cutoff}
+    
+    def save_upload_session(self, session_key, resumable_uri):
+        """Persist (or with resumable_uri=None, forget) the resumable session URI for a file"""
+        # Worker processes upload at the same time; reload under the lock so none drops another's session
+        with InterProcessLock(YOUTUBE_UPLOAD_SESSIONS_FILE):
+            sessions = self.load_upload_sessions()
+            if resumable_uri:
+                sessions[session_key] = {"uri": resumable_uri, "saved_at": time.time()}
+            else:
+                sessions.pop(session_key, None)
+            write_json_atomic(YOUTUBE_UPLOAD_SESSIONS_FILE, sessions)
+    
+    def upload_in_chunks(self, upload_request, filepath):
+        """
+        Drive a resumable upload with next_chunk(), logging per-chunk throughput
+        
+        The session URI is saved after the first chunk, so a retry or a restarted process
+        continues from the last byte YouTube acknowledged instead of starting over.
+        
+        Returns:
+            The API response once the upload is complete
+        """
+        session_key = self.upload_session_key(filepath)
+        total_bytes = os.path.getsize(filepath)
+        
+        saved_session = self.load_upload_sessions().get(session_key)
+        if saved_session:
+            logger.info("Resuming interrupted upload session...")
+            upload_request.resumable_uri = saved_session["uri"]
+            # Makes next_chunk ask YouTube how many bytes it already has before sending more
+            upload_request._in_error_state = True
+        
+        response = None
+        saved_uri = saved_session["uri"] if saved_session else None
+        upload_start = time.monotonic()
+        
+        while response is None:
+            chunk_start = time.monotonic()
+            bytes_before = upload_request.resumable_progress
+            # When resuming, the acknowledged offset is only known after this call
+            resuming = upload_request._in_error_state
             
-            # Extract hashtags from description
-            hashtags = []
-            if description:
-                # Look for hashtags in the description
-                hashtags = re.findall(r'#\w+', description)
-                # Make list unique
-                hashtags = list(set(hashtags))
+            try:
+                status, response = upload_request.next_chunk(num_retries=3)
+            except googleapiclient.errors.HttpError as e:
+                if saved_uri and e.resp.status in (404, 410):
+                    # The saved session has expired on YouTube's side; start a new one
+                    logger.warning("Saved upload session is no longer valid. Starting over...")
+                    self.save_upload_session(session_key, None)
+                    upload_request.resumable_uri = None
+                    upload_request.resumable_progress = 0
+                    upload_request._in_error_state = False
+                    saved_uri = None
+                    continue
+                raise
             
-            return {
-                "original_filepath": filepath,
-                "title": title,
-                "description": description,
-                "hashtags": hashtags,
-                "tags": ["shorts", "trending"],
-                "video_id": video_id
-            }
+            if upload_request.resumable_uri and upload_request.resumable_uri != saved_uri:
+                saved_uri = upload_request.resumable_uri
+                self.save_upload_session(session_key, saved_uri)
             
-        except Exception as e:
-            logger.error(f"Error downloading with yt-dlp {video_url}: {e}")
-            raise
+            if status and resuming:
+                logger.info(f"Resumed upload at {status.resumable_progress / (1024 * 1024):.1f}MB "
+                            f"of {total_bytes / (1024 * 1024):.1f}MB")
+            elif status:
+                chunk_bytes = status.resumable_progress - bytes_before
+                chunk_seconds = max(time.monotonic() - chunk_start, 1e-6)
+                logger.info(f"Uploaded {status.progress() * 100:.1f}% "
+                            f"({status.resumable_progress / (1024 * 1024):.1f}MB/{total_bytes / (1024 * 1024):.1f}MB) "
+                            f"at {chunk_bytes / chunk_seconds / (1024 * 1024):.2f}MB/s")
+        
+        elapsed = max(time.monotonic() - upload_start, 1e-6)
+        logger.info(f"Upload finished in {elapsed:.1f}s ({total_bytes / elapsed / (1024 * 1024):.2f}MB/s average)")
+        self.save_upload_session(session_key, None)
+        return response
     
     @retry(max_tries=MAX_UPLOAD_RETRIES, delay_seconds=5, exceptions=(googleapiclient.errors.HttpError,))
     def upload_video_to_my_channel(self, video_data):
@@ -805,7 +3005,7 @@ class YouTubeChannelReuploader:
                 return None
             
             # Create the media upload object
-            media = MediaFileUpload(filepath, resumable=True)
+            media = MediaFileUpload(filepath, chunksize=YOUTUBE_UPLOAD_CHUNK_SIZE, resumable=True)
             
             # Call the API to upload the video to YOUR channel
             logger.info(f"Uploading to YOUR channel: {video_data['title']}")
@@ -815,8 +3015,8 @@ class YouTubeChannelReuploader:
                 media_body=media
             )
             
-            # Execute the upload
-            response = upload_request.execute()
+            # Execute the upload chunk by chunk, resuming an interrupted session if there is one
+            response = self.upload_in_chunks(upload_request, filepath)
             logger.info(f"Upload complete! Video ID on YOUR channel: {response['id']}")
             
             # Force release of the file handle
@@ -841,8 +3041,8 @@ class YouTubeChannelReuploader:
         """Save TikTok login cookies for future use"""
         try:
             cookies = driver.get_cookies()
-            with open(cookie_file, "w") as f:
-                json.dump(cookies, f)
+            with InterProcessLock(cookie_file):
+                write_json_atomic(cookie_file, cookies)
             logger.info("TikTok cookies saved successfully")
         except Exception as e:
             logger.error(f"Error saving TikTok cookies: {e}")
@@ -853,7 +3053,7 @@ class YouTubeChannelReuploader:
             try:
                 # First navigate to TikTok domain
                 driver.get("https://www.tiktok.com")
-                time.sleep(2)
+                wait_until(driver, page_loaded, timeout=30)
                 
                 with open(cookie_file, "r") as f:
                     cookies = json.load(f)
@@ -870,7 +3070,7 @@ class YouTubeChannelReuploader:
                 logger.info("TikTok cookies loaded successfully")
                 # Refresh the page to apply cookies
                 driver.refresh()
-                time.sleep(2)
+                wait_until(driver, page_loaded, timeout=30)
                 return True
             except Exception as e:
                 logger.error(f"Error loading TikTok cookies: {e}")
@@ -887,143 +3087,65 @@ class YouTubeChannelReuploader:
             logger.info(f"Preparing to upload to TikTok: {title}")
             
             # Import required libraries for browser automation
-            from selenium import webdriver
-            from selenium.webdriver.chrome.options import Options
-            from selenium.webdriver.chrome.service import Service
             from selenium.webdriver.common.by import By
-            from selenium.webdriver.support.ui import WebDriverWait
-            from selenium.webdriver.support import expected_conditions as EC
             from selenium.webdriver.common.keys import Keys
             from selenium.webdriver.common.action_chains import ActionChains
-            from webdriver_manager.chrome import ChromeDriverManager
-            import time
             
-            # For headless environments (like Google Cloud VM)
-            try:
-                from pyvirtualdisplay import Display
-                is_headless = True
-                display = Display(visible=0, size=(1920, 1080))
-                display.start()
-                logger.info("Using virtual display for headless environment")
-            except ImportError:
-                is_headless = False
-                logger.info("Running in normal display mode")
-            
-            # Set up Chrome options
-            chrome_options = Options()
-            chrome_options.add_argument("--start-maximized")
-            chrome_options.add_argument("--disable-webrtc")  # Disable WebRTC to prevent STUN server errors
-            
-            # Additional options for headless environments
-            if is_headless:
-                chrome_options.add_argument("--no-sandbox")
-                chrome_options.add_argument("--disable-dev-shm-usage")
-                chrome_options.add_argument("--headless")
-            
-            chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
-            chrome_options.add_experimental_option('useAutomationExtension', False)
-            chrome_options.add_argument('--disable-blink-features=AutomationControlled')
-            chrome_options.add_experimental_option("prefs", {
-                "credentials_enable_service": False,
-                "profile.password_manager_enabled": False,
-                "profile.default_content_setting_values.images": 1  # Allow images
-            })
-            
-            # Initialize the driver
-            service = Service(ChromeDriverManager().install())
-            driver = webdriver.Chrome(service=service, options=chrome_options)
-            
-            # Execute CDP command to avoid detection
-            driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {
-                'source': '''
-                    Object.defineProperty(navigator, 'webdriver', {
-                        get: () => undefined
-                    })
-                '''
-            })
+            timings = self.tiktok_timings
+            selector_cache = self.tiktok_selectors
+            upload_started = time.monotonic()
+            
+            # Reuse the warm, logged-in browser from previous uploads
+            with timings.step("browser_session"):
+                driver = self.tiktok_session.acquire()
+            if driver is None:
+                return False
+            session_healthy = True
+            
+            # Indicators that we're on the upload page
+            upload_page_indicators = [
+                "//div[contains(@class, 'upload') or contains(@data-e2e, 'upload')]",
+                "//input[@type='file']",
+                "//span[contains(text(), 'Upload')]",
+                "//h1[contains(text(), 'Upload')]"
+            ]
+            
+            def upload_page_or_login(driver):
+                # Finish as soon as the upload page renders or TikTok redirects us to login
+                if "login" in driver.current_url.lower():
+                    return "login"
+                if selector_cache.find(driver, "upload_page", upload_page_indicators):
+                    return "upload"
+                return None
             
             try:
-                # First go to TikTok main page
-                logger.info("Navigating to TikTok...")
-                driver.get("https://www.tiktok.com")
-                time.sleep(3)
-                
-                # Try to load cookies if available
-                cookie_loaded = self.load_tiktok_cookies(driver)
-                
-                # Navigate to the login page if needed
-                if not cookie_loaded:
-                    # Go to login page
-                    driver.get("https://www.tiktok.com/login")
-                    logger.info("Please log in manually. Waiting for login to complete...")
-                    
-                    # Wait for user to log in (look for a profile indicator)
-                    logged_in = False
-                    wait_time = 120  # 2 minutes max wait
-                    start_time = time.time()
-                    
-                    while not logged_in and (time.time() - start_time) < wait_time:
-                        try:
-                            # Check if we have a user avatar visible (indicating logged in)
-                            if driver.find_elements(By.CSS_SELECTOR, "[data-e2e='profile-icon']") or \
-                               "login" not in driver.current_url.lower():
-                                logged_in = True
-                                break
-                        except:
-                            pass
-                        time.sleep(2)
-                    
-                    if logged_in:
-                        logger.info("Detected successful login. Saving cookies.")
-                        self.save_tiktok_cookies(driver)
-                    else:
-                        logger.warning("Login timed out. Please try again.")
-                        return False
-                
                 # Navigate to the upload page
                 logger.info("Navigating to upload page...")
-                driver.get("https://www.tiktok.com/upload")
-                time.sleep(5)  # Give the page time to load
+                with timings.step("upload_page"):
+                    driver.get("https://www.tiktok.com/upload")
+                    page_state = wait_until(driver, upload_page_or_login, timeout=30)
                 
                 # Sometimes TikTok redirects to login even with cookies, check if we need to log in again
-                if "login" in driver.current_url.lower():
+                if page_state == "login":
                     logger.info("Redirected to login. Cookie login failed, manual login required")
                     logger.info("Please log in manually. Waiting for login to complete...")
                     
                     # Wait for manual login completion
-                    wait_time = 120  # 2 minutes max wait
-                    start_time = time.time()
-                    
-                    while "login" in driver.current_url.lower() and (time.time() - start_time) < wait_time:
-                        time.sleep(2)
+                    logged_in = wait_until(driver, lambda d: "login" not in d.current_url.lower(),
+                                           timeout=120, poll_frequency=1)  # 2 minutes max wait
                     
-                    if "login" not in driver.current_url.lower():
+                    if logged_in:
                         logger.info("Detected successful login. Saving new cookies.")
                         self.save_tiktok_cookies(driver)
                         # Go to upload page again
-                        driver.get("https://www.tiktok.com/upload")
-                        time.sleep(5)
+                        with timings.step("upload_page"):
+                            driver.get("https://www.tiktok.com/upload")
+                            page_state = wait_until(driver, upload_page_or_login, timeout=30)
                     else:
                         logger.warning("Login timed out. Please try again.")
                         return False
                 
-                # Check if we're on the upload page by looking for indicators
-                upload_page_indicators = [
-                    "//div[contains(@class, 'upload') or contains(@data-e2e, 'upload')]",
-                    "//input[@type='file']",
-                    "//span[contains(text(), 'Upload')]",
-                    "//h1[contains(text(), 'Upload')]"
-                ]
-                
-                on_upload_page = False
-                for indicator in upload_page_indicators:
-                    try:
-                        if driver.find_elements(By.XPATH, indicator):
-                            on_upload_page = True
-                            logger.info(f"Upload page detected via: {indicator}")
-                            break
-                    except:
-                        pass
+                on_upload_page = page_state == "upload"
                 
                 if not on_upload_page:
                     logger.error("Failed to reach upload page. Current URL: " + driver.current_url)
@@ -1040,36 +3162,26 @@ class YouTubeChannelReuploader:
                     "input[accept*='mp4']"
                 ]
                 
-                for selector in selectors:
-                    try:
-                        elements = driver.find_elements(By.CSS_SELECTOR, selector)
-                        if elements:
-                            file_input = elements[0]
-                            logger.info(f"Found file input via: {selector}")
-                            break
-                    except:
-                        pass
+                file_input = selector_cache.find(driver, "file_input", selectors)
                 
                 if not file_input:
-                    # Try to find a hidden file input and make it visible
+                    # Find a hidden file input and make it visible, all in one script call
                     logger.info("Standard file input not found. Looking for hidden inputs...")
                     try:
-                        # Find all inputs and check if any are file inputs
-                        inputs = driver.find_elements(By.TAG_NAME, "input")
-                        for input_elem in inputs:
-                            try:
-                                if input_elem.get_attribute("type") == "file":
-                                    file_input = input_elem
-                                    # Make it visible using JavaScript
-                                    driver.execute_script("""
-                                        arguments[0].style.display = 'block';
-                                        arguments[0].style.visibility = 'visible';
-                                        arguments[0].style.opacity = '1';
-                                    """, file_input)
-                                    logger.info("Found and modified hidden file input")
-                                    break
-                            except:
-                                continue
+                        file_input = driver.execute_script("""
+                            var inputs = document.querySelectorAll('input');
+                            for (var i = 0; i < inputs.length; i++) {
+                                if (inputs[i].type === 'file') {
+                                    inputs[i].style.display = 'block';
+                                    inputs[i].style.visibility = 'visible';
+                                    inputs[i].style.opacity = '1';
+                                    return inputs[i];
+                                }
+                            }
+                            return null;
+                        """)
+                        if file_input:
+                            logger.info("Found and modified hidden file input")
                     except:
                         pass
                 
@@ -1083,7 +3195,8 @@ class YouTubeChannelReuploader:
                 
                 # Upload the video file
                 try:
-                    file_input.send_keys(abs_filepath)
+                    with timings.step("file_select"):
+                        file_input.send_keys(abs_filepath)
                     logger.info("Video file selected")
                 except Exception as e:
                     logger.error(f"Error sending file to input: {e}")
@@ -1094,9 +3207,7 @@ class YouTubeChannelReuploader:
                 logger.info("Waiting for video processing...")
                 
                 # Look for caption field to appear, which suggests video is processed
-                caption_found = False
                 max_wait = 120  # 2 minutes
-                start_time = time.time()
                 
                 caption_selectors = [
                     "div[data-e2e='upload-caption'] textarea",
@@ -1113,24 +3224,14 @@ class YouTubeChannelReuploader:
                     "//label[contains(text(), 'Caption')]/..//textarea"
                 ]
                 
-                while not caption_found and (time.time() - start_time) < max_wait:
-                    for selector in caption_selectors:
-                        try:
-                            if selector.startswith("//"):
-                                elements = driver.find_elements(By.XPATH, selector)
-                            else:
-                                elements = driver.find_elements(By.CSS_SELECTOR, selector)
-                                
-                            if elements and elements[0].is_displayed():
-                                caption_input = elements[0]
-                                caption_found = True
-                                logger.info(f"Caption field found via: {selector}")
-                                break
-                        except:
-                            pass
-                    
-                    if not caption_found:
-                        time.sleep(2)
+                with timings.step("video_processing"):
+                    caption_input = wait_until(
+                        driver,
+                        lambda d: selector_cache.find(d, "caption", caption_selectors, visible=True),
+                        timeout=max_wait,
+                        poll_frequency=0.5
+                    )
+                caption_found = caption_input is not None
                 
                 if not caption_found:
                     logger.warning("Caption field not found. Video may not have processed correctly.")
@@ -1187,9 +3288,8 @@ class YouTubeChannelReuploader:
                         # Method 1: Direct input for contenteditable
                         lambda: (
                             caption_input.click(),
-                            time.sleep(0.5),
+                            wait_until(driver, element_focused(caption_input), timeout=2, poll_frequency=0.05),
                             ActionChains(driver).key_down(Keys.CONTROL).send_keys('a').key_up(Keys.CONTROL).send_keys(Keys.DELETE).perform(),
-                            time.sleep(0.5),
                             caption_input.send_keys(caption_text),
                             logger.info("Caption entered with Method 1 (direct input)")
                         ),
@@ -1197,9 +3297,8 @@ class YouTubeChannelReuploader:
                         # Method 2: Character by character
                         lambda: (
                             caption_input.click(),
-                            time.sleep(0.5),
+                            wait_until(driver, element_focused(caption_input), timeout=2, poll_frequency=0.05),
                             caption_input.clear(),
-                            time.sleep(0.5),
                             [caption_input.send_keys(char) or time.sleep(0.02) for char in caption_text],
                             logger.info("Caption entered with Method 2 (character by character)")
                         ),
@@ -1217,11 +3316,9 @@ class YouTubeChannelReuploader:
                         # Method 4: ActionChains
                         lambda: (
                             ActionChains(driver).click(caption_input).perform(),
-                            time.sleep(0.5),
+                            wait_until(driver, element_focused(caption_input), timeout=2, poll_frequency=0.05),
                             ActionChains(driver).key_down(Keys.CONTROL).send_keys('a').key_up(Keys.CONTROL).perform(),
-                            time.sleep(0.2),
                             ActionChains(driver).send_keys(Keys.DELETE).perform(),
-                            time.sleep(0.5),
                             ActionChains(driver).send_keys(caption_text).perform(),
                             logger.info("Caption entered with Method 4 (ActionChains)")
                         ),
@@ -1240,13 +3337,14 @@ class YouTubeChannelReuploader:
                     
                     # Try each method until one works
                     caption_entered = False
-                    for i, method in enumerate(caption_entry_methods, 1):
-                        try:
-                            method()
-                            caption_entered = True
-                            break
-                        except Exception as e:
-                            logger.warning(f"Caption entry method {i} failed: {e}")
+                    with timings.step("caption"):
+                        for i, method in enumerate(caption_entry_methods, 1):
+                            try:
+                                method()
+                                caption_entered = True
+                                break
+                            except Exception as e:
+                                logger.warning(f"Caption entry method {i} failed: {e}")
                     
                     if caption_entered:
                         # No matter which method we used, try to tab away from the field to trigger any needed events
@@ -1289,42 +3387,41 @@ class YouTubeChannelReuploader:
                     "//button[contains(@class, 'btn-primary')]"
                 ]
 
-                # Try each selector
-                for selector in post_button_selectors:
-                    try:
-                        if selector.startswith("//"):
-                            elements = driver.find_elements(By.XPATH, selector)
-                        else:
-                            elements = driver.find_elements(By.CSS_SELECTOR, selector)
-                        
-                        if elements and elements[0].is_displayed() and elements[0].is_enabled():
-                            post_button = elements[0]
-                            logger.info(f"Post button found via: {selector}")
-                            break
-                    except:
-                        pass
+                # Try the selectors until the button is rendered and enabled
+                with timings.step("post_button"):
+                    post_button = wait_until(
+                        driver,
+                        lambda d: selector_cache.find(d, "post_button", post_button_selectors, visible=True, enabled=True),
+                        timeout=30,
+                        poll_frequency=0.5
+                    )
 
                 # If still not found, try a more aggressive approach - look for ANY button that might be the post button
                 if not post_button:
                     logger.info("Post button not found with specific selectors. Trying generic button search...")
                     try:
-                        # Get all buttons
-                        buttons = driver.find_elements(By.TAG_NAME, "button")
-                        # Filter for visible buttons in the bottom section of page
-                        for button in buttons:
-                            try:
-                                if button.is_displayed() and button.is_enabled():
-                                    button_text = button.text.lower()
-                                    # Look for buttons with post-related text or in typical post button positions
-                                    if ('post' in button_text or 'upload' in button_text or 'submit' in button_text or button_text == ''):
-                                        post_button = button
-                                        logger.info(f"Potential post button found via generic search: {button_text}")
-                                        break
-                            except:
-                                continue
+                        # Scan all visible, enabled buttons in the browser in a single call
+                        result = driver.execute_script("""
+                            var buttons = document.querySelectorAll('button');
+                            for (var i = 0; i < buttons.length; i++) {
+                                var button = buttons[i];
+                                var rect = button.getBoundingClientRect();
+                                if (button.disabled || rect.width === 0 || rect.height === 0) {
+                                    continue;
+                                }
+                                // Look for buttons with post-related text or in typical post button positions
+                                var text = (button.innerText || '').trim().toLowerCase();
+                                if (text.includes('post') || text.includes('upload') || text.includes('submit') || text === '') {
+                                    return [button, text];
+                                }
+                            }
+                            return null;
+                        """)
+                        if result:
+                            post_button, button_text = result
+                            logger.info(f"Potential post button found via generic search: {button_text}")
                     except Exception as e:
-                        logger.error(f"Error during generic button search: {e}")
-                
+                        logger.error(f"Error during generic button search: {e}")                
                 # Click the Post button
                 try:
                     post_button.click()
@@ -1341,62 +3438,67 @@ class YouTubeChannelReuploader:
                 
                 # Wait for upload to complete
                 logger.info("Waiting for upload to complete...")
-                success = False
                 max_wait_time = 300  # 5 minutes
                 start_time = time.time()
                 starting_url = driver.current_url  # Save the starting URL
                 
-                while not success and (time.time() - start_time) < max_wait_time:
+                def upload_finished(driver):
+                    # Return a description of the success signal, or None to keep waiting
                     current_url = driver.current_url
                     
-                    # Check for success indicators
+                    # Check for explicit success elements
+                    success_elements = driver.find_elements(By.CSS_SELECTOR, "div[data-e2e='upload-success']")
+                    if success_elements and any(elem.is_displayed() for elem in success_elements):
+                        return "Upload success element detected!"
+                    
+                    # Check for URL changes that indicate success
+                    if "success" in current_url or "/profile" in current_url or current_url == "https://www.tiktok.com/":
+                        return f"Upload success detected by URL change to: {current_url}"
+                    
+                    # Check if we're no longer on the upload page and URL has changed
+                    if "upload" not in current_url and current_url != starting_url:
+                        return f"Redirected from upload page to: {current_url}"
+                    
+                    # Check for any success messages in the visible text (much cheaper than page_source)
+                    if driver.execute_script(
+                        "var text = document.body ? document.body.innerText.toLowerCase() : '';"
+                        "return text.includes('upload successful') || text.includes('video uploaded');"
+                    ):
+                        return "Success message detected in page content"
+                    return None
+                
+                def upload_status(driver):
                     try:
-                        # Check for explicit success elements
-                        success_elements = driver.find_elements(By.CSS_SELECTOR, "div[data-e2e='upload-success']")
-                        if success_elements and any(elem.is_displayed() for elem in success_elements):
-                            success = True
-                            logger.info("Upload success element detected!")
-                            break
-                            
-                        # Check for URL changes that indicate success
-                        if "success" in current_url or "/profile" in current_url or current_url == "https://www.tiktok.com/":
-                            success = True
-                            logger.info(f"Upload success detected by URL change to: {current_url}")
-                            break
-                            
-                        # Check if we're no longer on the upload page and URL has changed
-                        if "upload" not in current_url and current_url != starting_url:
-                            logger.info(f"Redirected from upload page to: {current_url}")
-                            success = True
-                            break
-                            
+                        finished = upload_finished(driver)
+                        if finished:
+                            return finished
+                        
                         # Check if the Post button is no longer visible or has changed text
                         try:
                             if post_button and (not post_button.is_displayed() or 
                                               'Processing' in post_button.text or 
                                               'Uploading' in post_button.text or
                                               'Success' in post_button.text):
-                                logger.info(f"Post button state changed: {post_button.text if post_button.text else 'Not visible'}")
-                                # Wait a bit more to ensure the upload completes
-                                time.sleep(10)
-                                success = True
-                                break
+                                return "button"
                         except:
                             # Post button might have been removed from DOM
                             pass
-                            
-                        # Check for any success messages in the page content
-                        page_text = driver.page_source.lower()
-                        if "upload successful" in page_text or "video uploaded" in page_text:
-                            logger.info("Success message detected in page content")
-                            success = True
-                            break
                     except Exception as e:
                         logger.error(f"Error checking upload status: {e}")
+                    return None
+                
+                with timings.step("publish"):
+                    status = wait_until(driver, upload_status, timeout=max_wait_time, poll_frequency=1)
                     
-                    # Wait a bit before checking again
-                    time.sleep(5)
-                    logger.info(f"Still waiting... ({int(time.time() - start_time)} seconds elapsed)")
+                    if status == "button":
+                        logger.info(f"Post button state changed: {post_button.text if post_button.text else 'Not visible'}")
+                        # Give the upload up to 10 more seconds to show a definite success signal
+                        status = wait_until(driver, upload_finished, timeout=10, poll_frequency=0.5) or \
+                            "Upload assumed complete after Post button state change"
+                
+                success = status is not None
+                if success:
+                    logger.info(status)
                 
                 # If we've waited a long time and still don't have explicit success, consider it a success anyway
                 if (time.time() - start_time) >= 60 and not success:
@@ -1413,23 +3515,217 @@ class YouTubeChannelReuploader:
             except Exception as e:
                 logger.error(f"Error during TikTok upload process: {e}")
                 traceback.print_exc()
+                session_healthy = False
                 return False
                 
             finally:
-                # Close the browser
-                logger.info("Closing browser...")
-                time.sleep(5)  # Give a moment to finalize
-                driver.quit()
+                # Keep the browser for the next upload unless it needs recycling
+                self.tiktok_session.release(healthy=session_healthy)
                 
-                # Stop virtual display if we were using one
-                if is_headless:
-                    display.stop()
+                timings.record("total", time.monotonic() - upload_started)
+                timings.log_summary()
                 
         except Exception as e:
             logger.error(f"Error setting up TikTok upload: {e}")
             traceback.print_exc()
             raise
     
+    def upload_to_youtube(self, video_data):
+        """YouTube branch of the upload fan-out; returns a result dict"""
+        youtube_video_id = self.upload_video_to_my_channel(video_data)
+        
+        if youtube_video_id:
+            logger.info(f"Successfully uploaded video to YOUR YouTube channel: {video_data['title']}")
+            logger.info(f"View at: https://www.youtube.com/watch?v={youtube_video_id}")
+        else:
+            logger.warning(f"Failed to upload video to YOUR YouTube channel: {video_data['title']}")
+        return {"success": bool(youtube_video_id), "remote_id": youtube_video_id}
+    
+    def upload_to_tiktok(self, video_data):
+        """TikTok branch of the upload fan-out; returns a result dict"""
+        tiktok_success = self.upload_video_to_tiktok(video_data)
+        
+        if tiktok_success:
+            # A failed upload keeps its file so the video's job can retry it
+            self.schedule_file_for_deletion(video_data["filepath"])
+            logger.info(f"Successfully uploaded video to TikTok: {video_data['title']}")
+        else:
+            logger.warning(f"Failed to upload video to TikTok: {video_data['title']}")
+        return {"success": bool(tiktok_success), "remote_id": None}
+    
+    def upload_to_platforms(self, video_data, watermarked_paths, parallel=PARALLEL_UPLOADS):
+        """
+        Upload the watermarked copies to their platforms
+        
+        Args:
+            video_data: Metadata from download_video
+            watermarked_paths: {platform: watermarked file} from watermark_for_platforms
+            parallel: Run the platform branches concurrently in threads
+        
+        Returns:
+            {platform: {"platform", "success", "remote_id", "error", "elapsed"}}
+        """
+        branches = {"youtube": self.upload_to_youtube, "tiktok": self.upload_to_tiktok}
+        
+        def run_branch(platform):
+            start_time = time.monotonic()
+            result = {"platform": platform, "success": False, "remote_id": None, "error": None}
+            try:
+                # Each branch gets its own copy so the filepath doesn't leak between platforms
+                result.update(branches[platform](dict(video_data, filepath=watermarked_paths[platform])))
+            except Exception as e:
+                logger.error(f"{platform} upload process failed: {e}")
+                result["error"] = str(e)
+            result["elapsed"] = time.monotonic() - start_time
+            return result
+        
+        platforms = [platform for platform in branches if platform in watermarked_paths]
+        if parallel and len(platforms) > 1:
+            with ThreadPoolExecutor(max_workers=len(platforms)) as executor:
+                results = dict(zip(platforms, executor.map(run_branch, platforms)))
+        else:
+            results = {platform: run_branch(platform) for platform in platforms}
+        
+        for platform, result in results.items():
+            logger.info(f"{platform} upload {'succeeded' if result['success'] else 'failed'} in {result['elapsed']:.1f}s")
+        return results
+    
+    def enabled_platforms(self):
+        """Platforms that get a watermarked copy of each video"""
+        return [platform for platform, enabled in (("youtube", youtube_upload), ("tiktok", tiktok_upload)) if enabled]
+    
+    def fetch_video(self, video_url, platforms):
+        """Download a video, streaming it through the watermark pass when that is enabled"""
+        # Resumed jobs skipped the candidate check, so apply the media limits here too
+        info = self.get_video_info(video_url)
+        violations = media_limit_violations(info, platforms) if info else []
+        if violations:
+            logger.warning(f"Not downloading {video_url}: {'; '.join(violations)}")
+            return None
+        
+        # With the original already cached, a regular download is just a restore
+        if STREAMING_PIPELINE:
+            format_spec = select_download_format(info, platforms).format_spec if info else DOWNLOAD_FORMAT
+            download_key = MediaCache.key("download", video_id=extract_video_id(video_url), format=format_spec)
+            if not self.media_cache.contains(download_key, ".mp4"):
+                try:
+                    return self.download_and_watermark(video_url, platforms)
+                except Exception as e:
+                    logger.warning(f"Streaming pipeline failed, falling back to a regular download: {e}")
+        return self.download_video(video_url, platforms)
+    
+    def prepare_uploads(self, video_data, platforms):
+        """
+        Watermark the video for every enabled platform in a single FFmpeg pass
+        (already done while downloading in streaming mode)
+        """
+        watermarked_paths = video_data.get("watermarked_paths")
+        if watermarked_paths is None:
+            try:
+                watermarked_paths = self.watermark_for_platforms(video_data["original_filepath"], platforms)
+            except Exception as e:
+                logger.error(f"Watermarking failed: {e}")
+                watermarked_paths = {}
+        return watermarked_paths
+    
+    def check_job_files(self, job):
+        """Step a job back to the last stage whose output files still exist"""
+        stage = job["stage"]
+        if stage in ("watermarked", "uploaded_youtube", "uploaded_tiktok"):
+            pending_paths = [path for platform, path in (job["watermarked_paths"] or {}).items()
+                             if platform not in job["uploaded_platforms"]]
+            if not all(os.path.exists(path) for path in pending_paths):
+                stage = "downloaded"
+        if stage == "downloaded":
+            original_filepath = (job["video_data"] or {}).get("original_filepath")
+            if not original_filepath or not os.path.exists(original_filepath):
+                stage = "probed"
+        
+        if stage != job["stage"]:
+            logger.info(f"Files for job {job['video_id']} are missing, stepping back from {job['stage']} to {stage}")
+            job = self.jobs.advance(job["video_id"], stage)
+        return job
+    
+    def download_job_video(self, job, platforms):
+        """Download stage of a job (watermarking on the fly in streaming mode)"""
+        video_id = job["video_id"]
+        with self.job_downloads_lock:
+            if video_id in self.job_downloads:
+                raise yt_dlp.utils.DownloadError(f"Video {video_id} is already being downloaded")
+            self.job_downloads.add(video_id)
+        
+        try:
+            job = self.jobs.get(video_id) or job
+            if video_id in self.download_history:
+                if not job.get("claimed_by"):
+                    raise yt_dlp.utils.DownloadError(f"Video {video_id} was claimed outside this job")
+                # This job claimed the video in an attempt that was interrupted (or whose files were lost)
+                # and no download of it is running now, so the claim is stale
+                logger.info(f"Releasing stale claim on {video_id} from run {job['claimed_by']}")
+                self.release_video(video_id)
+            
+            self.jobs.record_claim(video_id, self.run_id)
+            video_data = self.fetch_video(job["video_url"], platforms)
+            if not video_data:
+                raise yt_dlp.utils.DownloadError(f"Download of {job['video_url']} returned nothing")
+        finally:
+            with self.job_downloads_lock:
+                self.job_downloads.discard(video_id)
+        
+        watermarked_paths = video_data.pop("watermarked_paths", None)
+        stage = "watermarked" if watermarked_paths is not None else "downloaded"
+        return self.jobs.advance(video_id, stage, video_data=video_data, watermarked_paths=watermarked_paths)
+    
+    def watermark_job_video(self, job, platforms):
+        """Watermark stage of a job"""
+        watermarked_paths = self.prepare_uploads(job["video_data"], platforms)
+        if not watermarked_paths:
+            raise subprocess.SubprocessError(f"Watermarking produced no files for {job['video_id']}")
+        return self.jobs.advance(job["video_id"], "watermarked", watermarked_paths=watermarked_paths)
+    
+    def upload_job_video(self, job, platforms):
+        """
+        Upload stage of a job: upload to the platforms that don't have the video yet.
+        Returns whether any upload succeeded; the original is scheduled for deletion once all have.
+        """
+        pending_paths = {platform: path for platform, path in job["watermarked_paths"].items()
+                         if platform in platforms and platform not in job["uploaded_platforms"]}
+        results = self.upload_to_platforms(job["video_data"], pending_paths)
+        
+        for platform, result in results.items():
+            if result["success"]:
+                job = self.jobs.mark_uploaded(job["video_id"], platform, platforms)
+        
+        if job["stage"] == "done":
+            self.schedule_file_for_deletion(job["video_data"]["original_filepath"])
+        return any(result["success"] for result in results.values())
+    
+    def fail_job(self, job, error):
+        """Count a failed attempt; once the job is given up, clean up the files it produced"""
+        job = self.jobs.record_failure(job["video_id"], error)
+        if job["stage"] == "failed":
+            logger.warning(f"Giving up on video {job['video_id']} after {job['attempts']} attempts: {error}")
+            self.schedule_file_for_deletion((job["video_data"] or {}).get("original_filepath"))
+            for path in (job["watermarked_paths"] or {}).values():
+                self.schedule_file_for_deletion(path)
+        return job
+    
+    def run_job(self, job, platforms):
+        """Drive a video job from its last completed stage through the uploads; returns whether any upload succeeded"""
+        job = self.check_job_files(job)
+        try:
+            if job["stage"] == "probed":
+                job = self.download_job_video(job, platforms)
+            if job["stage"] == "downloaded":
+                job = self.watermark_job_video(job, platforms)
+            if self.upload_job_video(job, platforms):
+                return True
+            self.fail_job(job, "No upload succeeded")
+        except Exception as e:
+            logger.error(f"Job for video {job['video_id']} failed at stage {job['stage']}: {e}")
+            self.fail_job(job, e)
+        return False
+    
     def process_source_channel(self, channel_url):
         """Process a single source channel - download one random video and upload to your channels"""
         logger.info(f"\nProcessing source channel: {channel_url} at {datetime.now()}")
@@ -1437,6 +3733,14 @@ class YouTubeChannelReuploader:
         # First try to delete any files from previous runs
         self.process_pending_deletions()
         
+        platforms = self.enabled_platforms()
+        
+        # Finish videos from this channel that an earlier run left half done
+        for job in self.jobs.unfinished(channel_url):
+            logger.info(f"Resuming video {job['video_id']} from stage {job['stage']}")
+            if self.run_job(job, platforms):
+                return True
+        
         # Try up to MAX_VIDEO_RETRIES random videos if there are download issues
         for attempt in range(MAX_VIDEO_RETRIES):
             # Get a random video URL from the source channel
@@ -1448,65 +3752,9 @@ class YouTubeChannelReuploader:
                 
             logger.info(f"Attempt {attempt+1}: Trying to download {video_url}")
             
-            # Download the video from the source channel
-            try:
-                video_data = self.download_video(video_url)
-            except Exception as e:
-                logger.error(f"Failed to download video: {e}")
-                logger.info(f"Attempt {attempt+1} failed. Trying another video...")
-                continue
-            
-            if video_data:
-                success = False
-                
-                if youtube_upload:
-                    try:
-                        # Add watermark to the video
-                        watermarked_path = self.add_watermark(
-                            video_data["original_filepath"], 
-                            watermark_text="© taylors_wonderland_official",  # Customize this
-                            position="bottom-middle"  # Options: "bottom-right", "bottom-left", "bottom-middle", "top-right", "top-left", "center"
-                        )
-                        video_data.update({"filepath": watermarked_path})
-                        
-                        # Upload the video to YOUR YouTube channel
-                        youtube_video_id = self.upload_video_to_my_channel(video_data)
-                        
-                        if youtube_video_id:
-                            logger.info(f"Successfully uploaded video to YOUR YouTube channel: {video_data['title']}")
-                            logger.info(f"View at: https://www.youtube.com/watch?v={youtube_video_id}")
-                            success = True
-                        else:
-                            logger.warning(f"Failed to upload video to YOUR YouTube channel: {video_data['title']}")
-                    except Exception as e:
-                        logger.error(f"YouTube upload process failed: {e}")
-                
-                if tiktok_upload:
-                    try:
-                        # Add watermark to the video
-                        watermarked_path = self.add_watermark(
-                            video_data["original_filepath"], 
-                            watermark_text="© taylorswift.wonderland",  # Customize this
-                            position="bottom-middle"  # Options: "bottom-right", "bottom-left", "bottom-middle", "top-right", "top-left", "center"
-                        )
-                        video_data.update({"filepath": watermarked_path})
-
-                        # Upload the video to TikTok as well
-                        tiktok_success = self.upload_video_to_tiktok(video_data)
-                        
-                        if tiktok_success:
-                            logger.info(f"Successfully uploaded video to TikTok: {video_data['title']}")
-                            success = True
-                        else:
-                            logger.warning(f"Failed to upload video to TikTok: {video_data['title']}")
-                    except Exception as e:
-                        logger.error(f"TikTok upload process failed: {e}")
-                
-                # Schedule original file for deletion
-                self.schedule_file_for_deletion(video_data["original_filepath"])
-                    
-                if success:
-                    return True
+            job = self.jobs.create(extract_video_id(video_url), video_url, channel_url)
+            if self.run_job(job, platforms):
+                return True
             
             logger.info(f"Attempt {attempt+1} failed. Trying another video...")
             
@@ -1514,31 +3762,325 @@ class YouTubeChannelReuploader:
         return False
 
 
-def process_channels_with_retries(reuploader, channels, max_retries=MAX_CHANNEL_RETRIES):
-    """Process channels with retries if one fails"""
-    # Shuffle the order to avoid hitting the same channels repeatedly
+# Reuploader owned by each worker process
+_worker_reuploader = None
+
+
+def _init_channel_worker():
+    """Give each worker process its own reuploader over the shared history and deletion list"""
+    global _worker_reuploader
+    _worker_reuploader = YouTubeChannelReuploader(shared_history=True)
+
+
+def _process_channel_in_worker(channel_url):
+    return bool(_worker_reuploader.process_source_channel(channel_url))
+
+
+def process_channels_in_workers(reuploader, channels, channels_per_cycle=WORKER_CHANNELS_PER_CYCLE,
+                                processes=WORKER_PROCESSES):
+    """
+    Process up to channels_per_cycle channels in parallel worker processes
+    
+    Keeps at most one channel per process in flight and never more than the quota still
+    open, replacing failed channels from the list (up to MAX_CHANNEL_RETRIES failures).
+    Returns the number of channels processed successfully.
+    """
     random.shuffle(channels)
+    pending_channels = iter(channels)
+    successes = failures = 0
+    in_flight = {}
     
-    for retry in range(max_retries):
-        if not channels:
-            logger.warning("No channels available to process")
-            return False
+    reuploader.process_pending_deletions()
+    
+    # Spawn rather than fork so workers don't inherit the parent's SQLite connections and threads
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=processes, mp_context=context, initializer=_init_channel_worker) as executor:
+        while True:
+            while (len(in_flight) < min(processes, channels_per_cycle - successes)
+                   and failures < MAX_CHANNEL_RETRIES):
+                channel_url = next(pending_channels, None)
+                if channel_url is None:
+                    break
+                logger.info(f"Dispatching channel to worker: {channel_url}")
+                in_flight[executor.submit(_process_channel_in_worker, channel_url)] = channel_url
             
-        # Pick a random channel
-        channel_url = random.choice(channels)
-        logger.info(f"Trying channel {retry+1}/{max_retries}: {channel_url}")
-        
-        success = reuploader.process_source_channel(channel_url)
-        if success:
-            logger.info(f"Successfully processed channel: {channel_url}")
-            return True
+            if not in_flight:
+                break
+            
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                channel_url = in_flight.pop(future)
+                try:
+                    success = future.result()
+                except Exception as e:
+                    logger.error(f"Worker failed on channel {channel_url}: {e}")
+                    success = False
+                
+                reuploader.channel_registry.record_result(channel_url, success)
+                if success:
+                    successes += 1
+                    logger.info(f"Successfully processed channel: {channel_url}")
+                else:
+                    failures += 1
+                    logger.warning(f"Failed to process channel: {channel_url}")
+    
+    logger.info(f"Worker cycle finished: {successes}/{channels_per_cycle} channels processed, {failures} failed")
+    return successes
+
+
+class PipelineOrchestrator:
+    """
+    Asyncio pipeline that runs discovery, probing, downloading, watermarking and uploading
+    as concurrent stages connected by bounded queues
+    
+    Blocking work (yt-dlp, FFmpeg, Selenium, the YouTube API) runs in a thread pool per stage,
+    so a slow channel only occupies one worker of one stage while the others keep going. Each
+    cycle feeds only as many channels as PIPELINE_VIDEOS_PER_CYCLE has room for, counting the
+    ones still in flight, and feeds another only after one fails (like the sequential loop,
+    which stopped at the first success); videos that finish processing after the quota is met
+    wait for the next cycle.
+    
+    Args:
+        reuploader: YouTubeChannelReuploader doing the actual work
+        cycle_interval: Seconds between the start of consecutive cycles
+        videos_per_cycle: Successful uploads per cycle
+        stage_workers: Concurrent workers for each stage
+        queue_size: Capacity of each queue between stages
+    """
+    STAGES = ("probe", "download", "watermark", "upload")
+    
+    def __init__(self, reuploader, cycle_interval=PIPELINE_CYCLE_INTERVAL, videos_per_cycle=PIPELINE_VIDEOS_PER_CYCLE,
+                 stage_workers=None, queue_size=PIPELINE_QUEUE_SIZE):
+        self.reuploader = reuploader
+        self.cycle_interval = cycle_interval
+        self.videos_per_cycle = videos_per_cycle
+        self.stage_workers = {**PIPELINE_STAGE_WORKERS, **(stage_workers or {})}
+        self.queue_size = queue_size
+        self.platforms = reuploader.enabled_platforms()
+        self.executors = {
+            stage: ThreadPoolExecutor(max_workers=self.stage_workers[stage], thread_name_prefix=f"pipeline-{stage}")
+            for stage in self.STAGES
+        }
+        self.executors["discovery"] = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pipeline-discovery")
+        self.cycle_uploads = 0
+        self.uploads_in_progress = 0
+        self.items_in_flight = 0  # Channels fed (or jobs resumed) that have neither succeeded nor given up
+        self._requeue_tasks = set()  # Pending hand_off puts, kept referenced until they complete
+        self.active_jobs = set()  # Video IDs currently moving through the stages
+    
+    async def run_blocking(self, stage, func, *args):
+        """Run a blocking call on the stage's executor (the loop's default executor if stage is None)"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executors.get(stage), func, *args)
+    
+    async def run(self):
+        """Start every stage and run until cancelled"""
+        self.queues = {stage: asyncio.Queue(maxsize=self.queue_size) for stage in self.STAGES}
+        self.quota_changed = asyncio.Condition()
+    
+        workers = {
+            "probe": self.probe_worker,
+            "download": self.download_worker,
+            "watermark": self.watermark_worker,
+            "upload": self.upload_worker,
+        }
+        tasks = [asyncio.create_task(self.run_discovery()), asyncio.create_task(self.run_cycles())]
+        for stage, worker in workers.items():
+            tasks += [asyncio.create_task(worker()) for _ in range(self.stage_workers[stage])]
+    
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            for executor in self.executors.values():
+                executor.shutdown(wait=False, cancel_futures=True)
+    
+    async def run_discovery(self):
+        """Refresh the channel registry in the background"""
+        registry = self.reuploader.channel_registry
+        while True:
+            try:
+                new_channels = await self.run_blocking("discovery", self.reuploader.find_channels, CHANNEL_DISCOVERY_BATCH)
+                logger.info(f"Channel discovery added {len(new_channels)} channels, registry now holds {len(registry)}")
+            except Exception as e:
+                logger.error(f"Channel discovery failed: {e}")
+            await asyncio.sleep(CHANNEL_DISCOVERY_INTERVAL)
+    
+    async def run_cycles(self):
+        """Feed registry channels into the pipeline once per cycle until the upload quota is met"""
+        while True:
+            cycle_deadline = time.monotonic() + self.cycle_interval
+            async with self.quota_changed:
+                self.cycle_uploads = 0
+                self.quota_changed.notify_all()
+    
+            await self.run_blocking(None, self.reuploader.process_pending_deletions)
             
-        # Remove failed channel from the list for this run
-        channels.remove(channel_url)
-        logger.warning(f"Failed to process channel: {channel_url}. {len(channels)} channels remaining.")
+            # Put videos an earlier run left half done back in at their last completed stage
+            for job in await self.run_blocking(None, self.reuploader.jobs.unfinished):
+                if job["video_id"] in self.active_jobs:
+                    continue
+                self.active_jobs.add(job["video_id"])
+                async with self.quota_changed:
+                    self.items_in_flight += 1
+                job = await self.run_blocking(None, self.reuploader.check_job_files, job)
+                logger.info(f"Resuming video {job['video_id']} from stage {job['stage']}")
+                self.hand_off(self.stage_queue(job), {"channel_url": job["channel_url"], "attempt": 0, "job": job})
+    
+            channels = self.reuploader.channel_registry.channel_urls()
+            random.shuffle(channels)
+            logger.info(f"Starting pipeline cycle with {len(channels)} source channels at {datetime.now()}")
+    
+            for channel_url in channels[:MAX_CHANNEL_RETRIES]:
+                # Wait until the quota has room beyond what is already in flight, i.e. for a failure
+                try:
+                    async with self.quota_changed:
+                        await asyncio.wait_for(
+                            self.quota_changed.wait_for(self.quota_has_room),
+                            timeout=max(cycle_deadline - time.monotonic(), 0)
+                        )
+                        if self.cycle_uploads >= self.videos_per_cycle:
+                            break
+                        self.items_in_flight += 1
+                except asyncio.TimeoutError:
+                    break
+                self.hand_off("probe", {"channel_url": channel_url, "attempt": 0})
+    
+            await asyncio.sleep(max(cycle_deadline - time.monotonic(), 0))
+    
+    def hand_off(self, stage, item):
+        """
+        Queue an item for a stage without waiting for room
+        
+        run_cycles must never block on a queue: finished videos wait at the upload gate for the
+        next cycle's quota reset, so a full queue behind them would stall the reset for good.
+        """
+        task = asyncio.create_task(self.queues[stage].put(item))
+        self._requeue_tasks.add(task)
+        task.add_done_callback(self._requeue_tasks.discard)
+    
+    def quota_has_room(self):
+        """True once the cycle's quota is met or has room for another channel beyond those in flight"""
+        return (self.cycle_uploads >= self.videos_per_cycle
+                or self.cycle_uploads + self.items_in_flight < self.videos_per_cycle)
+    
+    async def finish_item(self):
+        """Note that a channel succeeded or gave up, letting the cycle feed another if needed"""
+        async with self.quota_changed:
+            self.items_in_flight -= 1
+            self.quota_changed.notify_all()
+    
+    @staticmethod
+    def stage_queue(job):
+        """Queue that takes a job on from its current stage"""
+        if job["stage"] == "probed":
+            return "download"
+        if job["stage"] == "downloaded":
+            return "watermark"
+        return "upload"
+    
+    async def fail_job(self, item, reason):
+        """Count the failure against the video's job, then retry the channel with another video"""
+        self.active_jobs.discard(item["job"]["video_id"])
+        await self.run_blocking(None, self.reuploader.fail_job, item["job"], reason)
+        await self.retry_or_fail(item, reason)
+    
+    async def retry_or_fail(self, item, reason):
+        """Send the channel back for another video, or record it as failed after MAX_VIDEO_RETRIES"""
+        attempt = item["attempt"] + 1
+        logger.info(f"Attempt {attempt} for {item['channel_url']} failed ({reason})")
+        if attempt < MAX_VIDEO_RETRIES:
+            # Re-queue without blocking this worker, so a full probe queue cannot deadlock the stages
+            self.hand_off("probe", {"channel_url": item["channel_url"], "attempt": attempt})
+        else:
+            logger.warning(f"All attempts failed for {item['channel_url']}")
+            self.reuploader.channel_registry.record_result(item["channel_url"], False)
+            await self.finish_item()
+    
+    async def probe_worker(self):
+        while True:
+            item = await self.queues["probe"].get()
+            try:
+                # Videos queued for download are not claimed yet, so exclude them explicitly
+                get_video = partial(self.reuploader.get_random_channel_video, exclude_ids=frozenset(self.active_jobs))
+                video_url = await self.run_blocking("probe", get_video, item["channel_url"])
+                if video_url and extract_video_id(video_url) in self.active_jobs:
+                    await self.retry_or_fail(item, "picked a video already in flight")
+                elif video_url:
+                    job = self.reuploader.jobs.create(extract_video_id(video_url), video_url, item["channel_url"])
+                    self.active_jobs.add(job["video_id"])
+                    await self.queues["download"].put({**item, "job": job})
+                else:
+                    logger.warning(f"No videos available to download from {item['channel_url']}")
+                    self.reuploader.channel_registry.record_result(item["channel_url"], False)
+                    await self.finish_item()
+            except Exception as e:
+                logger.error(f"Probe stage failed for {item['channel_url']}: {e}")
+                await self.retry_or_fail(item, "probe error")
+            finally:
+                self.queues["probe"].task_done()
     
-    logger.error(f"Failed to process any channel after {max_retries} attempts.")
-    return False
+    async def download_worker(self):
+        while True:
+            item = await self.queues["download"].get()
+            try:
+                logger.info(f"Attempt {item['attempt'] + 1}: Trying to download {item['job']['video_url']}")
+                job = await self.run_blocking("download", self.reuploader.download_job_video,
+                                              item["job"], self.platforms)
+                await self.queues[self.stage_queue(job)].put({**item, "job": job})
+            except Exception as e:
+                logger.error(f"Failed to download video: {e}")
+                await self.fail_job(item, f"download error: {e}")
+            finally:
+                self.queues["download"].task_done()
+    
+    async def watermark_worker(self):
+        while True:
+            item = await self.queues["watermark"].get()
+            try:
+                job = await self.run_blocking("watermark", self.reuploader.watermark_job_video,
+                                              item["job"], self.platforms)
+                await self.queues["upload"].put({**item, "job": job})
+            except Exception as e:
+                logger.error(f"Watermarking failed: {e}")
+                await self.fail_job(item, f"watermark error: {e}")
+            finally:
+                self.queues["watermark"].task_done()
+    
+    async def upload_worker(self):
+        while True:
+            item = await self.queues["upload"].get()
+            try:
+                # Hold finished videos until the cycle has room for another upload
+                async with self.quota_changed:
+                    await self.quota_changed.wait_for(
+                        lambda: self.cycle_uploads + self.uploads_in_progress < self.videos_per_cycle
+                    )
+                    self.uploads_in_progress += 1
+    
+                success = False
+                try:
+                    success = await self.run_blocking("upload", self.reuploader.upload_job_video,
+                                                      item["job"], self.platforms)
+                except Exception as e:
+                    logger.error(f"Upload stage failed for {item['job']['video_url']}: {e}")
+                finally:
+                    async with self.quota_changed:
+                        self.uploads_in_progress -= 1
+                        if success:
+                            self.cycle_uploads += 1
+                            self.items_in_flight -= 1
+                        self.quota_changed.notify_all()
+    
+                if success:
+                    self.active_jobs.discard(item["job"]["video_id"])
+                    logger.info(f"Successfully processed channel: {item['channel_url']}")
+                    self.reuploader.channel_registry.record_result(item["channel_url"], True)
+                else:
+                    await self.fail_job(item, "upload failed")
+            finally:
+                self.queues["upload"].task_done()
 
 
 # Main function to schedule the task
@@ -1550,30 +4092,29 @@ def main():
         source_channel_urls = [
             "https://www.youtube.com/@Mywonderland13",  # Your existing channel
         ]
+        for channel_url in source_channel_urls:
+            reuploader.channel_registry.add_channel(channel_url)
         
-        # Find additional Taylor Swift channels
-        taylor_swift_channels = reuploader.find_channels(max_channels=1)
-        
-        # Add the found channels to the source list
-        source_channel_urls.extend(taylor_swift_channels)
-        
-        logger.info(f"Using {len(source_channel_urls)} source channels: {source_channel_urls}")
-        
-        def job():
-            # Process channels with retries
-            process_channels_with_retries(reuploader, source_channel_urls.copy())
+        logger.info(f"Channel registry holds {len(reuploader.channel_registry)} source channels")
         
-        # Schedule the job to run every 8 hours
-        schedule.every(8).hours.do(job)
-        
-        # Run the job once immediately
-        job()
-        
-        # Keep the script running
-        while True:
-            schedule.run_pending()
-            time.sleep(60)  # Check every minute
-            logger.info(f"Waiting for next scheduled run... Next run in approximately {int(schedule.idle_seconds()/60)} minutes")
+        if WORKER_PROCESSES:
+            # Process several channels per cycle, each in its own worker process
+            while True:
+                cycle_start = time.monotonic()
+                try:
+                    reuploader.find_channels(max_channels=CHANNEL_DISCOVERY_BATCH)
+                except Exception as e:
+                    logger.error(f"Channel discovery failed: {e}")
+                
+                process_channels_in_workers(reuploader, reuploader.channel_registry.channel_urls())
+                
+                wait_seconds = max(PIPELINE_CYCLE_INTERVAL - (time.monotonic() - cycle_start), 0)
+                logger.info(f"Waiting for next cycle... Next run in approximately {int(wait_seconds / 60)} minutes")
+                time.sleep(wait_seconds)
+        else:
+            # Run discovery, probing, downloading, watermarking and uploading as concurrent stages
+            orchestrator = PipelineOrchestrator(reuploader)
+            asyncio.run(orchestrator.run())
     
     except Exception as e:
         logger.critical(f"Critical error in main loop: {e}")